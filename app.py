@@ -1,25 +1,47 @@
 
 import streamlit as st
 import pandas as pd
-import os
 import io
-import zipfile
+import time
 from pathlib import Path
 
-from utils.data_loader import load_all_data
-from utils.processor import compute_officer_stats
-from utils.renderer import render_newsletters
+from utils.data_loader import load_all_data, resolve_caseload_schema
+from utils.matching import reconcile_inputs
+from utils.pipeline import STAGES, GenerationJob
+from utils.processor import select_officers
+
+# Rendered newsletters are cached here by a fingerprint of their inputs
+CACHE_DIR = Path(".newsletter_cache")
+# Per-officer stats of every generated period, for the trend table
+HISTORY_DB = Path("newsletter_history.sqlite")
 
 st.set_page_config(page_title="LAB Officer Newsletter Generator", layout="wide")
 st.title("📬 LAB Officer Newsletter Generator")
 
+# Parsed uploads are cached on the raw bytes, so reruns triggered by widget
+# changes skip encoding detection, header sniffing and CSV parsing entirely.
+# A different upload hashes differently and is parsed afresh. Lean loading
+# keeps large ratings exports small in the long-running Streamlit process.
+# Names in case_load/ratings are reconciled against the roster here too, so
+# the fuzzy matching also runs once per upload.
+@st.cache_data(max_entries=4, show_spinner="Parsing uploaded files…")
+def load_uploaded_data(ratings_bytes, caseload_bytes, namelist_bytes):
+    ratings_df, caseload_df, namelist_df, period = load_all_data(
+        io.BytesIO(ratings_bytes), io.BytesIO(caseload_bytes), io.BytesIO(namelist_bytes),
+        lean=True
+    )
+    caseload_df, ratings_df, name_report = reconcile_inputs(namelist_df, caseload_df, ratings_df)
+    return ratings_df, caseload_df, namelist_df, period, name_report
+
+
 # ——— Sidebar: File Uploads —————————————————————————————————————————————————————————————————
 
 with st.sidebar:
     st.header("📂 Upload Files")
-    ratings_file = st.file_uploader("Upload `ratings.csv`", type="csv")
-    caseload_file = st.file_uploader("Upload `case_load.csv`", type="csv")
-    namelist_file = st.file_uploader("Upload `namelist.csv`", type="csv")
+    # Excel exports are streamed straight from the workbook; no CSV conversion needed
+    ratings_file = st.file_uploader("Upload `ratings.csv` or `.xlsx`", type=["csv", "xlsx"])
+    caseload_file = st.file_uploader("Upload `case_load.csv` or `.xlsx`", type=["csv", "xlsx"])
+    namelist_file = st.file_uploader("Upload `namelist.csv` or `.xlsx`", type=["csv", "xlsx"])
 
     if not (ratings_file and caseload_file and namelist_file):
         st.warning("Please upload all three files to proceed.")
@@ -29,11 +51,24 @@ with st.sidebar:
 if ratings_file and caseload_file and namelist_file:
     # Attempt to load namelist to populate multiselect
     try:
-        _, _, namelist_df, _ = load_all_data(ratings_file, caseload_file, namelist_file)
+        _, _, namelist_df, _, name_report = load_uploaded_data(
+            ratings_file.getvalue(), caseload_file.getvalue(), namelist_file.getvalue()
+        )
     except Exception as e:
         st.error(f"❌ Failed to read files: {e}")
         st.stop()
 
+    # Names that did not match the roster exactly
+    inexact = name_report[name_report["method"] != "exact"]
+    if not inexact.empty:
+        matched = (inexact["method"] == "fuzzy").sum()
+        st.warning(
+            f"⚠️ {matched} names were matched to the namelist approximately and "
+            f"{len(inexact) - matched} could not be matched (those rows are left out)."
+        )
+        with st.expander("Name matching report"):
+            st.dataframe(inexact, hide_index=True)
+
     st.subheader("Filter and Select Officers to Generate Newsletters")
 
     # Dropdown to filter by function
@@ -44,10 +79,7 @@ if ratings_file and caseload_file and namelist_file:
     )
 
     # Filter namelist_df by selected function
-    if function_filter != "All":
-        filtered_namelist = namelist_df[namelist_df['function'].str.upper() == function_filter]
-    else:
-        filtered_namelist = namelist_df
+    filtered_namelist = select_officers(namelist_df, function_filter)
 
     officer_names = filtered_namelist['name'].dropna().str.strip().tolist()
 
@@ -57,83 +89,148 @@ if ratings_file and caseload_file and namelist_file:
         options=officer_names
     )
 
-    # Generate button
+    save_to_disk = st.checkbox("Also save HTML files to ./output/", value=False)
+    show_trends = st.checkbox(
+        "Record this period in the history store and show trends from previous periods",
+        value=True
+    )
+    compact_output = st.checkbox(
+        "Compact output (minified HTML, smaller ZIP)", value=False
+    )
+    compare_size = st.checkbox(
+        "Compare the compact size with the standard output (renders every page twice)",
+        value=False, disabled=not compact_output
+    )
+
+    # Generate button: the pipeline runs as a background job kept in the
+    # session, so reruns (widget changes, download clicks) do not kill it
     if st.button("Generate Newsletters"):
+        previous = st.session_state.get("generation_job")
+        if previous is not None:
+            previous.close()
         try:
-            # Reload all data for computation
-            ratings_df, caseload_df, namelist_df, period = load_all_data(
-                ratings_file, caseload_file, namelist_file
+            # Fetch the parsed data (a cache hit unless the uploads changed)
+            ratings_df, caseload_df, namelist_df, period, _ = load_uploaded_data(
+                ratings_file.getvalue(), caseload_file.getvalue(), namelist_file.getvalue()
             )
 
-            # Apply same function filtering after reload
-            if function_filter != "All":
-                namelist_df = namelist_df[namelist_df['function'].str.upper() == function_filter]
+            # Apply the same function filter, then narrow to the selected officers
+            filtered = select_officers(namelist_df, function_filter, selected_officers)
 
-            # Determine which subset of officers to process
-            if selected_officers:
-                filtered = namelist_df[namelist_df['name'].isin(selected_officers)]
-            else:
-                filtered = namelist_df.copy()
+            schema = resolve_caseload_schema(caseload_df.columns, period)
+            st.session_state["generation_warnings"] = (
+                ["⚠️ case_load.csv is missing columns for: " + ", ".join(schema.missing)
+                 + ". These figures will show as 0 or N/A."]
+                if schema.missing else []
+            )
 
-            all_reports = []
-            for _, officer_row in filtered.iterrows():
-                stats = compute_officer_stats(officer_row, caseload_df, ratings_df, period)
-                all_reports.append(stats)
+            # Compute and render each officer's HTML in memory as (<ABBR>.html, bytes)
+            # pairs, reusing cached newsletters whose inputs have not changed
+            st.session_state["generation_job"] = GenerationJob(
+                filtered, caseload_df, ratings_df, period, schema=schema,
+                cache_dir=CACHE_DIR,
+                history_db=HISTORY_DB if show_trends else None,
+                output_dir=Path("output") if save_to_disk else None,
+                build_zip=not selected_officers,
+                compact="inline" if compact_output else None,
+                compare_size=compare_size
+            ).start()
+        except Exception as e:
+            st.error(f"❌ An error occurred during processing: {e}")
 
-            # Render each officer's HTML into output/<ABBR>.html
-            output_dir = Path("output")
-            if not output_dir.exists():
-                output_dir.mkdir(parents=True)
-            else:
-                # Clear out any existing .html files to avoid stale downloads
-                for f in output_dir.glob("*.html"):
-                    f.unlink()
+    job = st.session_state.get("generation_job")
+    if job is None:
+        st.info("After selecting officers, click 'Generate Newsletters' to create and download.")
+    else:
+        for warning in st.session_state.get("generation_warnings", []):
+            st.warning(warning)
+        snapshot = job.snapshot()
+
+        if snapshot["status"] == "running":
+            st.markdown("### Generating…")
+            for stage in STAGES:
+                counts = snapshot["progress"][stage]
+                done, total = counts["done"], counts["total"]
+                st.progress(
+                    done / total if total else 0.0,
+                    text=f"{stage.capitalize()}: {done} / {total} officers"
+                )
+            if st.button("Cancel"):
+                job.cancel()
+            # Poll the job until it finishes
+            time.sleep(0.5)
+            st.rerun()
+
+        if snapshot["status"] == "failed":
+            st.error(f"❌ An error occurred during processing: {snapshot['error']}")
+        elif snapshot["status"] == "cancelled":
+            st.warning("Generation was cancelled.")
+        else:
+            st.success("Newsletters generated successfully!")
+            st.caption(
+                f"Generated {len(job.files)} newsletters "
+                f"({job.cache_summary['misses']} regenerated, {job.cache_summary['hits']} reused unchanged)."
+            )
+
+        if job.errors:
+            st.warning(f"⚠️ {len(job.errors)} officers could not be generated and were left out.")
+            with st.expander("Officer errors"):
+                st.dataframe(pd.DataFrame(job.errors), hide_index=True)
+
+        # Where the time went, per stage
+        with st.expander("Run metrics", expanded=True):
+            metrics = snapshot["metrics"]
+            total = metrics.get("total", {})
+            columns = st.columns(4)
+            columns[0].metric("Total time", f"{total.get('seconds', 0):.2f}s")
+            columns[1].metric("Newsletters", total.get("officers", 0))
+            columns[2].metric("Throughput", f"{total.get('per_second', 0):.1f}/s")
+            columns[3].metric("Output size", f"{total.get('bytes', 0) / 2 ** 20:.1f} MiB")
+            if job.size_comparison:
+                st.caption(
+                    f"Compact output is {job.size_comparison['size_ratio']:.0%} of the "
+                    f"{job.size_comparison['standard_bytes'] / 2 ** 20:.1f} MiB standard output."
+                )
+            st.dataframe(
+                pd.DataFrame([
+                    {"stage": stage, "seconds": round(values["seconds"], 3),
+                     "officers": values["officers"], "officers/s": round(values["per_second"], 1)}
+                    for stage, values in metrics.items() if stage != "total"
+                ]),
+                hide_index=True
+            )
 
-            render_newsletters(all_reports, output_dir)
+        if job.report_timings:
+            with st.expander("Per-newsletter timings"):
+                st.dataframe(
+                    pd.DataFrame(job.report_timings).sort_values(
+                        "render_seconds", ascending=False, na_position="last"
+                    ),
+                    hide_index=True
+                )
 
-            st.success("Newsletters generated successfully!")
+        if job.files:
             st.markdown("### Download Individual Newsletters:")
 
-            
             # Offer ZIP download if all officers selected
-            if not selected_officers:
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-                    for report in all_reports:
-                        abbr = report['abbreviation']
-                        file_path = output_dir / f"{abbr}.html"
-                        if file_path.exists():
-                            zipf.write(file_path, arcname=f"{abbr}.html")
-                zip_buffer.seek(0)
+            # The archive is read from its spooled file only when clicked
+            if job.zip_file is not None:
                 st.download_button(
                     label="📦 Download All Newsletters (ZIP)",
-                    data=zip_buffer,
+                    data=job.read_zip,
                     file_name="all_newsletters.zip",
                     mime="application/zip"
                 )
 
             # Show a download button per officer
-
-            for report in all_reports:
-                abbr = report['abbreviation']
-                file_path = output_dir / f"{abbr}.html"
-                if file_path.exists():
-                    with open(file_path, "rb") as f:
-                        data = f.read()
-                    st.download_button(
-                        label=f"Download {abbr}.html",
-                        data=data,
-                        file_name=f"{abbr}.html",
-                        mime="text/html",
-                        key=f"download_{abbr}"
-                    )
-                else:
-                    st.error(f"Missing expected file: {file_path}")
-
-        except Exception as e:
-            st.error(f"❌ An error occurred during processing: {e}")
-    else:
-        st.info("After selecting officers, click 'Generate Newsletters' to create and download.")
+            for file_name, data in job.files:
+                st.download_button(
+                    label=f"Download {file_name}",
+                    data=data,
+                    file_name=file_name,
+                    mime="text/html",
+                    key=f"download_{file_name}"
+                )
 
 else:
     st.info("Upload all three files (ratings.csv, case_load.csv, namelist.csv) to enable generation.")
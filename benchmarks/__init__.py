@@ -0,0 +1 @@
+# Placeholder for benchmarks/__init__.py
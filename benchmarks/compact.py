@@ -0,0 +1,75 @@
+"""
+Compare the standard and compact output modes on synthetic data: render
+time, total page bytes and ZIP size for the whole batch.
+
+    python -m benchmarks.compact --officers 2000
+"""
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+from benchmarks.run import _load
+from benchmarks.synthetic import generate
+from utils.packager import write_zip
+from utils.processor import compute_all_officer_stats
+from utils.renderer import COMPACT_MODES, get_template, iter_newsletter_files, stylesheet_file
+
+
+def benchmark(officers, ratings, repeat=3, workers=None, data_dir=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate(os.path.join(data_dir or tmp, f"{officers}_{ratings}"), officers, ratings)
+        ratings_df, caseload_df, namelist_df, period = _load(paths)
+    reports = compute_all_officer_stats(namelist_df, caseload_df, ratings_df, period)
+
+    results = []
+    for compact in (None,) + COMPACT_MODES:
+        get_template(compact=compact)  # compile outside the timed runs
+        seconds = []
+        for _ in range(repeat):
+            started = perf_counter()
+            files = list(iter_newsletter_files(reports, workers=workers, compact=compact))
+            seconds.append(perf_counter() - started)
+        asset = stylesheet_file(compact)
+        if asset is not None:
+            files.insert(0, asset)
+        with write_zip(files) as archive:
+            zip_bytes = len(archive.read())
+        results.append({
+            "mode": compact or "standard",
+            "render_seconds": min(seconds),
+            "bytes": sum(len(data) for _, data in files),
+            "zip_bytes": zip_bytes,
+        })
+    return results
+
+
+def print_results(officers, results):
+    standard = results[0]
+    print(f"\n{officers} officers")
+    print(f"{'mode':<10}{'render s':>10}{'MiB':>8}{'vs std':>8}{'ZIP MiB':>9}{'vs std':>8}")
+    for row in results:
+        print(
+            f"{row['mode']:<10}{row['render_seconds']:>10.3f}"
+            f"{row['bytes'] / 2 ** 20:>8.2f}{row['bytes'] / standard['bytes']:>8.0%}"
+            f"{row['zip_bytes'] / 2 ** 20:>9.2f}{row['zip_bytes'] / standard['zip_bytes']:>8.0%}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compact")
+    parser.add_argument("--officers", type=int, nargs="+", default=[2000])
+    parser.add_argument("--ratings", type=int, default=None,
+                        help="rating rows (default: 20 per officer)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--data-dir", default=None, help="keep generated inputs here")
+    args = parser.parse_args(argv)
+
+    for officers in args.officers:
+        ratings = args.ratings or officers * 20
+        print_results(officers, benchmark(officers, ratings, args.repeat, args.workers, args.data_dir))
+
+
+if __name__ == "__main__":
+    main()
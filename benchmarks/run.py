@@ -0,0 +1,130 @@
+"""
+Stage-by-stage benchmark of the newsletter pipeline on synthetic data.
+
+    python -m benchmarks.run --officers 50 500 5000 --ratings-per-officer 20
+    python -m benchmarks.run --officers 2000 --ratings 1000000 --memory --json results.json
+
+Each stage (load, compute, render, package) is timed separately; the best of
+--repeat runs is reported. With --memory, a separate tracemalloc pass records
+each stage's peak allocation (kept apart because tracing slows the timings).
+"""
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+from benchmarks.synthetic import generate
+from utils.data_loader import load_all_data, memory_footprint, resolve_caseload_schema
+from utils.packager import write_zip
+from utils.processor import compute_all_officer_stats
+from utils.renderer import iter_newsletter_files
+
+STAGES = ("load", "compute", "render", "package")
+
+
+def _load(paths, lean=False):
+    with open(paths["ratings"], "rb") as ratings_file, \
+            open(paths["caseload"], "rb") as caseload_file, \
+            open(paths["namelist"], "rb") as namelist_file:
+        return load_all_data(ratings_file, caseload_file, namelist_file, lean=lean)
+
+
+def _stage_functions(paths, workers, lean=False):
+    state = {}
+
+    def load():
+        state["data"] = _load(paths, lean)
+        state["loaded_bytes"] = sum(memory_footprint(df) for df in state["data"][:3])
+
+    def compute():
+        ratings_df, caseload_df, namelist_df, period = state["data"]
+        schema = resolve_caseload_schema(caseload_df.columns, period)
+        state["reports"] = compute_all_officer_stats(namelist_df, caseload_df, ratings_df, period, schema)
+
+    def render():
+        state["files"] = list(iter_newsletter_files(state["reports"], workers=workers))
+
+    def package():
+        with write_zip(state["files"]) as archive:
+            archive.seek(0, os.SEEK_END)
+            state["zip_bytes"] = archive.tell()
+
+    return state, dict(zip(STAGES, (load, compute, render, package)))
+
+
+def run_pipeline(paths, workers=None, trace_memory=False, lean=False):
+    """Run every stage once; return ({stage: seconds}, {stage: peak bytes}, loaded frame bytes)."""
+    state, stages = _stage_functions(paths, workers, lean)
+    seconds, peaks = {}, {}
+    for name, stage in stages.items():
+        if trace_memory:
+            tracemalloc.start()
+        started = perf_counter()
+        stage()
+        seconds[name] = perf_counter() - started
+        if trace_memory:
+            peaks[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return seconds, peaks, state["loaded_bytes"]
+
+
+def benchmark(officers, ratings, repeat=3, workers=None, memory=False, data_dir=None, lean=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate(os.path.join(data_dir or tmp, f"{officers}_{ratings}"), officers, ratings)
+        runs = [run_pipeline(paths, workers, lean=lean) for _ in range(repeat)]
+        result = {
+            "officers": officers,
+            "ratings": ratings,
+            "lean": lean,
+            "seconds": {stage: min(run[0][stage] for run in runs) for stage in STAGES},
+            "loaded_bytes": runs[0][2],
+        }
+        if memory:
+            result["peak_bytes"] = run_pipeline(paths, workers, trace_memory=True, lean=lean)[1]
+    return result
+
+
+def print_result(result):
+    print(f"\n{result['officers']} officers, {result['ratings']} rating rows"
+          f"{' (lean)' if result['lean'] else ''}: "
+          f"{result['loaded_bytes'] / 2 ** 20:.1f} MiB of loaded DataFrames")
+    print(f"{'stage':<10}{'best s':>10}{'peak MiB':>12}")
+    for stage in STAGES:
+        peak = result.get("peak_bytes", {}).get(stage)
+        peak_text = f"{peak / 2 ** 20:>12.1f}" if peak is not None else f"{'-':>12}"
+        print(f"{stage:<10}{result['seconds'][stage]:>10.3f}{peak_text}")
+    total = sum(result["seconds"].values())
+    print(f"{'total':<10}{total:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--officers", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--ratings", type=int, default=None,
+                        help="rating rows per scale (default: officers × --ratings-per-officer)")
+    parser.add_argument("--ratings-per-officer", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--memory", action="store_true", help="also record peak memory per stage")
+    parser.add_argument("--lean", action="store_true", help="use lean typed CSV loading")
+    parser.add_argument("--data-dir", default=None, help="keep generated inputs here")
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for officers in args.officers:
+        ratings = args.ratings if args.ratings is not None else officers * args.ratings_per_officer
+        result = benchmark(officers, ratings, args.repeat, args.workers, args.memory,
+                           args.data_dir, args.lean)
+        print_result(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Synthetic ratings.csv / case_load.csv / namelist.csv generator for
+benchmarks. The files follow the real export layouts, including the
+preamble rows above the case_load.csv header and the duplicated
+"Clearance rate (%)" columns.
+
+    python -m benchmarks.synthetic --officers 2000 --ratings 100000 --out bench_data/
+"""
+import argparse
+import csv
+import os
+import random
+
+FIRST_NAMES = ["Wei Ling", "Muhammad", "Siti", "Rajesh", "Mei Hua", "Ahmad", "Priya",
+               "Jun Jie", "Nurul", "Kumar", "Hui Min", "Farah", "Daniel", "Aisha"]
+LAST_NAMES = ["Tan", "Lim", "Lee", "Ng", "Wong", "Goh", "Rahman", "Singh", "Chua",
+              "Ong", "Koh", "Ismail", "Pillai", "Teo"]
+QUESTIONS = [
+    "The officer explained my legal options clearly",
+    "The officer responded to my queries promptly",
+    "The officer was courteous and professional",
+    "I understood the next steps in my case",
+    "Overall, I am satisfied with the service",
+]
+
+
+def officer_roster(officers, seed=0):
+    rng = random.Random(seed)
+    roster = []
+    for i in range(officers):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i:05d}"
+        roster.append({
+            "name": name,
+            "abbreviation": f"OF{i:05d}",
+            "function": "LO" if rng.random() < 0.6 else "LE",
+        })
+    return roster
+
+
+def caseload_headers(start, end):
+    return [
+        "Name", "Function",
+        f"In-house caseload as at {start}",
+        f"Additional in-house cases between {start} to {end}",
+        f"In-house cases NFA- 07 and NFA-12 between {start} to {end}",
+        f"In-house cases NFA- others between {start} to {end}",
+        f"In-house caseload as at {end}",
+        "Increase /decrease of cases",
+        "Clearance rate (%)",
+        f"Assigned caseload as at {start}",
+        f"Additional assigned cases between {start} to {end}",
+        f"Assigned cases NFA- 07 between {start} to {end}",
+        f"Assigned cases NFA- others between {start} to {end}",
+        f"Assigned caseload as at {end}",
+        "Increase/ decrease of cases",
+        "Clearance rate (%)",
+        f"Total Caseload as at {start}",
+        f"Total Caseload as at {end}",
+        "Total cases NFA-ed",
+        "% increase or decrease",
+    ]
+
+
+def _flow(rng):
+    opening = rng.randint(0, 60)
+    added = rng.randint(0, 30)
+    nfa_712 = rng.randint(0, min(opening + added, 20))
+    nfa_others = rng.randint(0, min(opening + added - nfa_712, 10))
+    reassigned = rng.randint(-3, 3)
+    end = max(opening + added - nfa_712 - nfa_others + reassigned, 0)
+    clearance = round((nfa_712 + nfa_others) / opening * 100, 1) if opening else 0
+    return [opening, added, nfa_712, nfa_others, end, end - opening, clearance]
+
+
+def write_namelist(path, roster):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Name", "Abbreviation", "Function"])
+        for officer in roster:
+            writer.writerow([officer["name"], officer["abbreviation"], officer["function"]])
+
+
+def write_caseload(path, roster, start="01/04/2024", end="30/06/2024", seed=0):
+    rng = random.Random(seed + 1)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Legal Aid Bureau - Officer Caseload Report"])
+        writer.writerow([f"Reporting period: {start} to {end}"])
+        writer.writerow([])
+        writer.writerow(caseload_headers(start, end))
+        for officer in roster:
+            inhouse = _flow(rng)
+            assigned = _flow(rng)
+            total_start = inhouse[0] + assigned[0]
+            total_end = inhouse[4] + assigned[4]
+            total_nfa = inhouse[2] + inhouse[3] + assigned[2] + assigned[3]
+            pct = round((total_end - total_start) / total_start * 100, 1) if total_start else 0
+            writer.writerow(
+                [officer["name"], officer["function"]] + inhouse + assigned
+                + [total_start, total_end, total_nfa, pct]
+            )
+
+
+def write_ratings(path, roster, rows, seed=0):
+    rng = random.Random(seed + 2)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Case Ref No", "Subject Matter", "MTO", "Assigned Out Indicator",
+                         "Applicant", "Abbreviation", "Name", "Type"] + QUESTIONS)
+        for i in range(rows):
+            officer = rng.choice(roster)
+            writer.writerow([
+                f"LAB/2024/{i:07d}",
+                rng.choice(["Divorce", "Maintenance", "Custody", "Estate", "Tort"]),
+                rng.choice(["Y", "N"]),
+                rng.choice(["N", "N", "Y"]),
+                f"Applicant {i}",
+                officer["abbreviation"],
+                officer["name"],
+                rng.choice(["Survey", "Feedback"]),
+            ] + [rng.randint(1, 5) for _ in QUESTIONS])
+
+
+def generate(out_dir, officers=500, ratings=20000, seed=0):
+    """
+    Write namelist.csv, case_load.csv and ratings.csv for `officers` officers
+    and `ratings` survey rows into out_dir. Returns the three paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    roster = officer_roster(officers, seed)
+    paths = {
+        "ratings": os.path.join(out_dir, "ratings.csv"),
+        "caseload": os.path.join(out_dir, "case_load.csv"),
+        "namelist": os.path.join(out_dir, "namelist.csv"),
+    }
+    write_namelist(paths["namelist"], roster)
+    write_caseload(paths["caseload"], roster, seed=seed)
+    write_ratings(paths["ratings"], roster, ratings, seed=seed)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic")
+    parser.add_argument("--officers", type=int, default=500)
+    parser.add_argument("--ratings", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args(argv)
+    paths = generate(args.out, args.officers, args.ratings, args.seed)
+    for path in paths.values():
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compare the streaming .xlsx reader with pd.read_excel on synthetic
+workbooks: wall time and peak traced memory per input file.
+
+    python -m benchmarks.xlsx --officers 2000 --ratings 200000
+
+Each workbook holds the synthetic CSV rows on a "Data" sheet behind a small
+"Notes" sheet, so the reader has to find the right sheet as well as the
+header row (case_load keeps its preamble rows). pd.read_excel is given the
+sheet and header row up front, which the real uploads do not provide.
+"""
+import argparse
+import csv
+import gc
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import pandas as pd
+from openpyxl import Workbook
+
+from benchmarks.synthetic import generate
+from utils.data_loader import read_xlsx
+
+INPUTS = ("ratings", "caseload", "namelist")
+
+
+def _cell(text):
+    if text == "":
+        return None
+    for number in (int, float):
+        try:
+            return number(text)
+        except ValueError:
+            pass
+    return text
+
+
+def csv_to_xlsx(csv_path, xlsx_path):
+    """Write csv_path to a write-only workbook; returns the header row index."""
+    workbook = Workbook(write_only=True)
+    notes = workbook.create_sheet("Notes")
+    notes.append(["Synthetic export for benchmarks"])
+    data = workbook.create_sheet("Data")
+    header_row = None
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for i, row in enumerate(csv.reader(f)):
+            if header_row is None and "Name" in row:
+                header_row = i
+            data.append([_cell(text) for text in row])
+    workbook.save(xlsx_path)
+    return header_row
+
+
+def _seconds(fn):
+    started = perf_counter()
+    fn()
+    return perf_counter() - started
+
+
+def _peak_bytes(fn):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(officers, ratings, repeat=3, data_dir=None):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate(os.path.join(data_dir or tmp, f"{officers}_{ratings}"), officers, ratings)
+        for name in INPUTS:
+            xlsx_path = os.path.splitext(paths[name])[0] + ".xlsx"
+            header_row = csv_to_xlsx(paths[name], xlsx_path)
+
+            def streaming():
+                with open(xlsx_path, "rb") as f:
+                    return read_xlsx(f)
+
+            def read_excel():
+                return pd.read_excel(xlsx_path, sheet_name="Data", header=header_row)
+
+            row = {"input": name, "bytes": os.path.getsize(xlsx_path)}
+            for label, fn in (("streaming", streaming), ("read_excel", read_excel)):
+                row[f"{label}_seconds"] = min(_seconds(fn) for _ in range(repeat))
+                row[f"{label}_peak_bytes"] = _peak_bytes(fn)
+            results.append(row)
+    return results
+
+
+def print_results(officers, ratings, results):
+    print(f"\n{officers} officers, {ratings} rating rows")
+    print(f"{'input':<11}{'MiB':>7}{'stream s':>10}{'excel s':>10}{'stream MiB':>12}{'excel MiB':>11}")
+    for row in results:
+        print(
+            f"{row['input']:<11}{row['bytes'] / 2 ** 20:>7.1f}"
+            f"{row['streaming_seconds']:>10.3f}{row['read_excel_seconds']:>10.3f}"
+            f"{row['streaming_peak_bytes'] / 2 ** 20:>12.1f}{row['read_excel_peak_bytes'] / 2 ** 20:>11.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.xlsx")
+    parser.add_argument("--officers", type=int, nargs="+", default=[500])
+    parser.add_argument("--ratings", type=int, default=None,
+                        help="rating rows (default: 20 per officer)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default=None, help="keep generated inputs here")
+    args = parser.parse_args(argv)
+
+    for officers in args.officers:
+        ratings = args.ratings or officers * 20
+        print_results(officers, ratings, benchmark(officers, ratings, args.repeat, args.data_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Headless entry point for scheduled / batch newsletter runs.
+
+    python -m cli --ratings ratings.csv --caseload case_load.csv \
+        --namelist namelist.csv --output out/ [--format zip] [--function LO] [--export pdf]
+
+Exits with status 1 on data errors or when any officer's newsletter fails,
+and prints a per-stage timing summary.
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+from time import perf_counter
+
+from utils.data_loader import load_all_data, resolve_caseload_schema
+from utils.exporter import export_newsletters
+from utils.mailer import DEFAULT_SUBJECT, dispatch_newsletters, recipients_from_namelist
+from utils.matching import DEFAULT_THRESHOLD, reconcile_inputs
+from utils.packager import write_files, write_zip
+from utils.pipeline import STAGES, GenerationJob, add_write_timings
+from utils.processor import select_officers
+from utils.renderer import COMPACT_MODES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Generate LAB officer newsletters without the Streamlit UI."
+    )
+    parser.add_argument("--ratings", required=True, help="path to ratings.csv (or .xlsx)")
+    parser.add_argument("--caseload", required=True, help="path to case_load.csv (or .xlsx)")
+    parser.add_argument("--namelist", required=True, help="path to namelist.csv (or .xlsx)")
+    parser.add_argument("--output", default="output", help="target directory (default: output)")
+    parser.add_argument("--format", choices=["html", "zip"], default="html",
+                        help="write individual HTML files or one all_newsletters.zip")
+    parser.add_argument("--function", choices=["All", "LO", "LE"], default="All",
+                        help="only officers with this function")
+    parser.add_argument("--officer", action="append", default=[], metavar="NAME",
+                        help="only this officer (repeatable)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="render on a process pool with this many workers")
+    parser.add_argument("--compact", choices=COMPACT_MODES, default=None,
+                        help="minified pages: 'inline' keeps the CSS in each page, 'linked' writes "
+                             "one shared newsletter.css (not usable with --export/--send)")
+    parser.add_argument("--timings", default=None, metavar="CSV",
+                        help="write each newsletter's render/write seconds and bytes to this CSV")
+    parser.add_argument("--compare-size", action="store_true",
+                        help="with --compact, also render the standard pages to report the size saved "
+                             "(renders every page twice)")
+    parser.add_argument("--lean", action="store_true",
+                        help="load only the columns the stats use, with compact dtypes (less memory)")
+    parser.add_argument("--match-threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="minimum fuzzy score (0-100) to map a misspelt name onto the namelist "
+                             f"(default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--name-report", default=None, metavar="CSV",
+                        help="write names that did not match the namelist exactly to this CSV")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse newsletters from this artifact cache when an officer's inputs are unchanged")
+    parser.add_argument("--history-db", default=None,
+                        help="SQLite file of past periods: record this period and show trends")
+    parser.add_argument("--history-periods", type=int, default=4,
+                        help="previous periods to show in the trend table (default: 4)")
+    parser.add_argument("--export", action="append", choices=["pdf", "png"], default=[],
+                        help="also export each newsletter as PDF/PNG via headless Chromium (repeatable)")
+    parser.add_argument("--browser-pages", type=int, default=4,
+                        help="number of reusable Chromium pages for --export (default: 4)")
+    parser.add_argument("--chromium", default=None, help="path to a Chromium/Chrome binary for --export")
+
+    mail = parser.add_argument_group("email dispatch (password is read from $LAB_SMTP_PASSWORD)")
+    mail.add_argument("--send", action="store_true",
+                      help="email each newsletter to the address in namelist.csv's 'email' column")
+    mail.add_argument("--smtp-host", default="localhost")
+    mail.add_argument("--smtp-port", type=int, default=587)
+    mail.add_argument("--smtp-user", default=None)
+    mail.add_argument("--smtp-ssl", action="store_true", help="connect with implicit TLS (SMTPS)")
+    mail.add_argument("--no-starttls", action="store_true", help="do not upgrade with STARTTLS")
+    mail.add_argument("--sender", default=None, help="From address (default: --smtp-user)")
+    mail.add_argument("--subject", default=DEFAULT_SUBJECT)
+    mail.add_argument("--send-rate", type=float, default=5.0, help="max messages per second")
+    mail.add_argument("--send-workers", type=int, default=1, help="parallel SMTP connections")
+    mail.add_argument("--send-log", default=None,
+                      help="resumable send log; officers already listed are not emailed again")
+    args = parser.parse_args(argv)
+    if args.send and not (args.sender or args.smtp_user):
+        parser.error("--send needs a From address: pass --sender or --smtp-user")
+    if args.compact == "linked" and (args.export or args.send):
+        parser.error("--compact linked pages need newsletter.css beside them; "
+                     "use --compact inline with --export/--send")
+    return args
+
+
+def print_timings(timings, count):
+    print(f"{'stage':<10}{'seconds':>10}")
+    for stage, seconds in timings.items():
+        print(f"{stage:<10}{seconds:>10.3f}")
+    total = sum(timings.values())
+    print(f"{'total':<10}{total:>10.3f}")
+    if total:
+        print(f"{count} newsletters, {count / total:.1f} per second")
+
+
+def print_report_timings(report_timings):
+    for step in ("render", "write"):
+        measured = [t for t in report_timings if t[f"{step}_seconds"] is not None]
+        if not measured:
+            continue
+        seconds = [t[f"{step}_seconds"] for t in measured]
+        slowest = max(measured, key=lambda t: t[f"{step}_seconds"])
+        print(f"{step}: {sum(seconds) / len(seconds) * 1000:.2f} ms per newsletter, "
+              f"slowest {slowest['abbreviation']} ({slowest[f'{step}_seconds'] * 1000:.2f} ms)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    timings = {}
+
+    try:
+        started = perf_counter()
+        with open(args.ratings, "rb") as ratings_file, \
+                open(args.caseload, "rb") as caseload_file, \
+                open(args.namelist, "rb") as namelist_file:
+            ratings_df, caseload_df, namelist_df, period = load_all_data(
+                ratings_file, caseload_file, namelist_file, lean=args.lean
+            )
+        timings["load"] = perf_counter() - started
+
+        started = perf_counter()
+        caseload_df, ratings_df, name_report = reconcile_inputs(
+            namelist_df, caseload_df, ratings_df, args.match_threshold
+        )
+        inexact = name_report[name_report["method"] != "exact"]
+        if not inexact.empty:
+            matched = (inexact["method"] == "fuzzy").sum()
+            print(f"warning: {matched} names matched the namelist approximately, "
+                  f"{len(inexact) - matched} unmatched", file=sys.stderr)
+        if args.name_report:
+            inexact.to_csv(args.name_report, index=False)
+        timings["match"] = perf_counter() - started
+
+        filtered = select_officers(namelist_df, args.function, args.officer)
+        if filtered.empty:
+            raise ValueError("No officers match the given --function/--officer filters.")
+        schema = resolve_caseload_schema(caseload_df.columns, period)
+        if schema.missing:
+            print(f"warning: case_load.csv is missing columns for: {', '.join(schema.missing)}",
+                  file=sys.stderr)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    # The app's generation job, run in the foreground: with --cache-dir only
+    # officers whose inputs changed are computed and rendered
+    job = GenerationJob(
+        filtered, caseload_df, ratings_df, period, schema=schema, cache_dir=args.cache_dir,
+        history_db=args.history_db, history_periods=args.history_periods, workers=args.workers,
+        build_zip=False, compact=args.compact, compare_size=args.compare_size
+    ).start()
+    try:
+        job.join()
+    except KeyboardInterrupt:
+        job.cancel()
+        job.join()
+        print("error: cancelled", file=sys.stderr)
+        return 1
+    for stage in STAGES:
+        if stage in job.metrics:
+            timings[stage] = job.metrics[stage]["seconds"]
+    for error in job.errors:
+        print(f"error: {error['abbreviation']} ({error['stage']}): {error['error']}", file=sys.stderr)
+    if job.status != "done":
+        print(f"error: {job.error}", file=sys.stderr)
+        return 1
+    if args.cache_dir:
+        print(f"cache: {job.cache_summary['hits']} reused, {job.cache_summary['misses']} regenerated")
+    newsletter_files = list(job.files)
+
+    html_files = [(name, data) for name, data in newsletter_files if name.endswith(".html")]
+
+    if args.export:
+        started = perf_counter()
+        try:
+            exported, _ = export_newsletters(
+                newsletter_files, formats=tuple(args.export),
+                pool_size=args.browser_pages, executable_path=args.chromium
+            )
+        except Exception as e:  # missing pyppeteer, Chromium failing to launch, ...
+            print(f"error: export failed: {e}", file=sys.stderr)
+            return 1
+        newsletter_files += exported
+        timings["export"] = perf_counter() - started
+
+    started = perf_counter()
+    if args.format == "zip":
+        os.makedirs(args.output, exist_ok=True)
+        target = os.path.join(args.output, "all_newsletters.zip")
+        with write_zip(newsletter_files) as archive, open(target, "wb") as f:
+            shutil.copyfileobj(archive, f)
+    else:
+        write_timings = []
+        write_files(newsletter_files, args.output, timings=write_timings)
+        add_write_timings(job.report_timings, write_timings)
+    timings["write"] = perf_counter() - started
+
+    if args.send:
+        started = perf_counter()
+        try:
+            recipients = recipients_from_namelist(filtered)
+            summary = dispatch_newsletters(
+                html_files, recipients, args.smtp_host, args.smtp_port,
+                sender=args.sender, username=args.smtp_user,
+                password=os.environ.get("LAB_SMTP_PASSWORD"), subject=args.subject,
+                use_ssl=args.smtp_ssl, starttls=not args.no_starttls,
+                workers=args.send_workers, rate=args.send_rate, log_path=args.send_log
+            )
+        except (OSError, ValueError) as e:  # no email column, unwritable --send-log
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        timings["send"] = perf_counter() - started
+        print(
+            f"emailed {len(summary['sent'])}, skipped {len(summary['skipped'])} already sent, "
+            f"{len(summary['no_address'])} without an address, {len(summary['failed'])} failed "
+            f"({summary['messages_per_second']:.1f} messages/s)"
+        )
+        for failure in summary["failed"]:
+            print(f"error: {failure['abbreviation']} <{failure['to']}>: {failure['error']}", file=sys.stderr)
+
+    output_size = f"{sum(len(data) for _, data in newsletter_files) / 2 ** 20:.2f} MiB of output"
+    if job.size_comparison:
+        comparison = job.size_comparison
+        output_size += (f" ({args.compact} compact mode; the pages are {comparison['size_ratio']:.0%} "
+                        f"of the {comparison['standard_bytes'] / 2 ** 20:.2f} MiB standard output)")
+    elif args.compact:
+        output_size += f" ({args.compact} compact mode)"
+    print(output_size)
+    print_timings(timings, len(html_files))
+    print_report_timings(job.report_timings)
+    if args.timings:
+        with open(args.timings, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(
+                f, ["abbreviation", "cached", "render_seconds", "write_seconds", "bytes"]
+            )
+            writer.writeheader()
+            writer.writerows(job.report_timings)
+    return 1 if job.errors or (args.send and summary["failed"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
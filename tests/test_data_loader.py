@@ -0,0 +1,96 @@
+import csv
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from benchmarks.synthetic import generate
+from utils.data_loader import (
+    detect_header_and_load_csv, detect_header_and_load_xlsx, estimate_default_footprint,
+    memory_footprint, read_ratings_csv, read_ratings_xlsx, sniff_header_row
+)
+
+PREAMBLE = "LAB caseload report\n"
+HEADER = "Name,Function,In-house caseload as at 01/04/2024\n"
+BODY = "Tan Wei Ling,LO,3\nRajesh Kumar,LE,4\n"
+
+
+@pytest.mark.parametrize("text, header_row", [
+    (HEADER + BODY, 0),
+    (PREAMBLE + "Period: Q1\n" + HEADER + BODY, 2),
+    (PREAMBLE + "\n\n" + HEADER + BODY, 3),
+    ('"LAB caseload report\nspanning two lines",\n' + HEADER + BODY, 1),
+], ids=["line-0", "preamble", "blank-lines", "quoted-newline"])
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"], ids=["lf", "crlf", "cr"])
+def test_header_row_is_found_and_loaded(text, header_row, newline):
+    file = io.BytesIO(text.replace("\n", newline).encode("utf-8"))
+
+    row, cells = sniff_header_row(file, "utf-8")
+    assert row == header_row
+    assert cells[0] == "Name"
+    assert file.tell() == 0
+
+    df = detect_header_and_load_csv(file)
+    assert list(df.columns) == ["name", "function", "in-house caseload as at 01/04/2024"]
+    assert df["name"].tolist() == ["Tan Wei Ling", "Rajesh Kumar"]
+
+
+def test_record_cut_by_the_sniff_window_is_ignored():
+    text = PREAMBLE + HEADER + BODY
+    cut = len(PREAMBLE) + len(HEADER) - 5  # ends inside the header row
+    with pytest.raises(ValueError, match="header row"):
+        sniff_header_row(io.BytesIO(text.encode("utf-8")), "utf-8", sniff_bytes=cut)
+
+
+def test_missing_header_is_reported():
+    text = PREAMBLE * 20 + HEADER + BODY
+    with pytest.raises(ValueError, match="first 15 rows"):
+        sniff_header_row(io.BytesIO(text.encode("utf-8")), "utf-8")
+
+
+def _as_xlsx(text):
+    """The CSV text as a one-sheet workbook, blank cells left empty and numbers as numbers."""
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    for record in csv.reader(io.StringIO(text, newline='')):
+        worksheet.append([
+            None if cell == "" else float(cell) if cell.replace(".", "", 1).isdigit() else cell
+            for cell in record
+        ])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("lean", [False, True], ids=["standard", "lean"])
+def test_blank_cells_stay_missing_in_xlsx_as_in_csv(lean):
+    caseload = PREAMBLE + HEADER + "Tan Wei Ling,,3\n,LE,4\nRajesh Kumar,LE,5\n"
+    ratings = (
+        "Case Ref No,Applicant,Assigned Out Indicator,Name,Overall\n"
+        "LAB/1,Applicant 1,N,Tan Wei Ling,4\n"
+        "LAB/2,,N,,5\n"
+        "LAB/3,Applicant 3,,Rajesh Kumar,\n"
+    )
+
+    from_csv = detect_header_and_load_csv(io.BytesIO(caseload.encode("utf-8")), lean=lean)
+    from_xlsx = detect_header_and_load_xlsx(_as_xlsx(caseload), lean=lean)
+    assert from_xlsx["name"].isna().tolist() == [False, True, False]
+    assert from_xlsx["function"].isna().tolist() == [True, False, False]
+    pd.testing.assert_frame_equal(from_xlsx, from_csv, check_dtype=False)
+    assert from_xlsx["name"].dtype == from_csv["name"].dtype
+
+    from_csv = read_ratings_csv(io.BytesIO(ratings.encode("utf-8")), "utf-8", lean=lean)
+    from_xlsx = read_ratings_xlsx(_as_xlsx(ratings), lean=lean)
+    assert from_xlsx["Name"].isna().tolist() == [False, True, False]
+    pd.testing.assert_frame_equal(from_xlsx, from_csv, check_dtype=False)
+
+
+def test_default_footprint_is_estimated_from_a_sample(tmp_path):
+    paths = generate(str(tmp_path), officers=50, ratings=5000, seed=5)
+    with open(paths["ratings"], "rb") as f:
+        actual = memory_footprint(read_ratings_csv(f, "utf-8"))
+        estimate = estimate_default_footprint(f, 5000, "utf-8", sample_rows=500)
+        assert f.tell() == 0
+    assert abs(estimate - actual) / actual < 0.1
@@ -0,0 +1,41 @@
+import codecs
+import io
+
+import pytest
+
+from utils.encoding import CHUNK_SIZE, detect_encoding_info
+
+TEXT = "Name,Function\nTan Wei Ling,LO\nJosé Müller,LE\n"
+
+
+@pytest.mark.parametrize("data, encoding, method", [
+    (codecs.BOM_UTF8 + TEXT.encode("utf-8"), "utf-8-sig", "bom"),
+    (TEXT.encode("utf-16"), "utf-16", "bom"),
+    (TEXT.encode("utf-8"), "utf-8", "utf-8"),
+    (b"Name,Function\n", "utf-8", "utf-8"),
+], ids=["utf-8-bom", "utf-16-bom", "utf-8", "ascii"])
+def test_bom_and_utf8(data, encoding, method):
+    file = io.BytesIO(data)
+    info = detect_encoding_info(file)
+    assert (info["encoding"], info["method"]) == (encoding, method)
+    assert file.tell() == 0
+
+
+def test_non_utf8_byte_after_the_first_chunk_is_not_missed():
+    # An ASCII prefix longer than one chunk, then a cp1252/latin-1 name
+    data = b"Name,Function\n" + b"Tan Wei Ling,LO\n" * (2 * CHUNK_SIZE // 16) + "José,LE\n".encode("cp1252")
+    file = io.BytesIO(data)
+
+    info = detect_encoding_info(file)
+
+    assert info["method"] in ("chardet", "fallback")
+    assert info["encoding"].lower() not in ("ascii", "utf-8")
+    assert file.tell() == 0
+    assert data.decode(info["encoding"]).endswith("José,LE\n")
+
+
+def test_latin1_text_is_detected():
+    data = ("Name,Function\n" + "Müller Jürgen,LO\nFrançois Lefèvre,LE\n" * 50).encode("latin-1")
+    info = detect_encoding_info(io.BytesIO(data))
+    assert info["method"] in ("chardet", "fallback")
+    assert data.decode(info["encoding"]) == ("Name,Function\n" + "Müller Jürgen,LO\nFrançois Lefèvre,LE\n" * 50)
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from utils.exporter import export_newsletters_async
+
+
+class FakePage:
+    """Stands in for a pyppeteer page; records what it was asked to do."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.content = None
+
+    async def setContent(self, html):
+        assert not self.closed
+        self.browser.active += 1
+        self.browser.peak = max(self.browser.peak, self.browser.active)
+        self.content = html
+        # Later documents finish first, so ordering is not by completion
+        await asyncio.sleep(0.001 * (10 - int(html.split()[-1]) % 10))
+        self.browser.active -= 1
+
+    async def pdf(self, options):
+        if "fail" in self.content:
+            raise RuntimeError("page crashed")
+        return f"pdf:{self.content}".encode("utf-8")
+
+    async def screenshot(self, options):
+        return f"png:{self.content}".encode("utf-8")
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.pages = []
+        self.active = 0
+        self.peak = 0
+        self.closed = False
+
+    async def newPage(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+def _files(count):
+    return [(f"OF{i:03d}.html", f"newsletter {i}".encode("utf-8")) for i in range(count)]
+
+
+def test_pages_are_pooled_and_results_keep_input_order():
+    browser = FakeBrowser()
+    files = _files(12)
+    exported, timings = asyncio.run(export_newsletters_async(
+        files, formats=("pdf", "png"), pool_size=3, browser=browser
+    ))
+
+    assert len(browser.pages) == 3
+    assert browser.peak <= 3
+    assert [name for name, _ in exported] == [
+        f"OF{i:03d}.{ext}" for i in range(12) for ext in ("pdf", "png")
+    ]
+    assert exported[0] == ("OF000.pdf", b"pdf:newsletter 0")
+    assert [timing["name"] for timing in timings] == [name for name, _ in files]
+    # A browser passed in is left open; its pages are not
+    assert all(page.closed for page in browser.pages)
+    assert not browser.closed
+
+
+def test_pool_is_not_larger_than_the_batch():
+    browser = FakeBrowser()
+    asyncio.run(export_newsletters_async(_files(2), pool_size=8, browser=browser))
+    assert len(browser.pages) == 2
+
+
+def test_failure_closes_every_page_and_returns_nothing():
+    browser = FakeBrowser()
+    files = _files(10)
+    files[4] = ("OF004.html", b"fail 4")
+
+    with pytest.raises(RuntimeError, match="page crashed"):
+        asyncio.run(export_newsletters_async(files, pool_size=3, browser=browser))
+
+    assert len(browser.pages) == 3
+    assert all(page.closed for page in browser.pages)
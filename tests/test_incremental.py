@@ -0,0 +1,31 @@
+import os
+import threading
+
+from utils.incremental import ArtifactCache
+
+
+def test_concurrent_puts_of_one_fingerprint(tmp_path):
+    caches = [ArtifactCache(str(tmp_path)) for _ in range(8)]
+    data = b"<html>" + b"x" * 20_000 + b"</html>"
+    errors = []
+
+    def put(cache):
+        try:
+            for _ in range(10):
+                cache.put("abc123", data)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put, args=(cache,)) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert caches[0].get("abc123") == data
+    assert os.listdir(caches[0].objects_dir) == ["abc123.html"]
+
+
+def test_missing_fingerprint(tmp_path):
+    assert ArtifactCache(str(tmp_path)).get("missing") is None
@@ -0,0 +1,152 @@
+import json
+import socket
+from email import message_from_bytes
+
+import pytest
+
+from utils.mailer import SendLog, dispatch_newsletters
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+
+class Handler:
+    """Accepts mail, but answers 451 to the first try of each address in
+    transient and 550 to every address in rejected."""
+
+    def __init__(self, transient=(), rejected=()):
+        self.transient = set(transient)
+        self.rejected = set(rejected)
+        self.attempts = {}
+        self.delivered = []
+
+    async def handle_DATA(self, server, session, envelope):
+        address = envelope.rcpt_tos[0]
+        self.attempts[address] = self.attempts.get(address, 0) + 1
+        if address in self.rejected:
+            return "550 Mailbox unavailable"
+        if address in self.transient and self.attempts[address] == 1:
+            return "451 Try again later"
+        self.delivered.append((envelope.mail_from, address, message_from_bytes(envelope.content)))
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+
+    def start(handler):
+        controller = controller_module.Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        servers.append(controller)
+        return controller.port
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def _files(count):
+    return [(f"OF{i}.html", f"<p>Newsletter {i}</p>".encode("utf-8")) for i in range(count)]
+
+
+def _recipients(count):
+    return {f"OF{i}": f"of{i}@example.org" for i in range(count)}
+
+
+def _dispatch(port, files, recipients, **kwargs):
+    kwargs.setdefault("sender", "lab@example.org")
+    return dispatch_newsletters(
+        files, recipients, "127.0.0.1", port, starttls=False, rate=0, retry_delay=0, timeout=5,
+        **kwargs
+    )
+
+
+def test_sends_each_newsletter_with_its_sender(smtp_server):
+    handler = Handler()
+    port = smtp_server(handler)
+    summary = _dispatch(port, _files(3), _recipients(3), workers=2)
+
+    assert sorted(summary["sent"]) == ["OF0", "OF1", "OF2"]
+    assert summary["failed"] == [] and summary["no_address"] == []
+    assert {address for _, address, _ in handler.delivered} == set(_recipients(3).values())
+    mail_from, _, message = handler.delivered[0]
+    assert mail_from == "lab@example.org"
+    assert message["From"] == "lab@example.org"
+
+
+def test_retries_transient_and_records_permanent_failures(smtp_server):
+    handler = Handler(transient={"of0@example.org"}, rejected={"of1@example.org"})
+    port = smtp_server(handler)
+    summary = _dispatch(port, _files(3), _recipients(3))
+
+    assert sorted(summary["sent"]) == ["OF0", "OF2"]
+    assert handler.attempts["of0@example.org"] == 2
+    assert [failure["abbreviation"] for failure in summary["failed"]] == ["OF1"]
+    assert handler.attempts["of1@example.org"] == 1
+    assert summary["failed"][0]["error"].startswith("(550")
+
+
+def test_send_log_resumes_without_resending(smtp_server, tmp_path):
+    handler = Handler()
+    port = smtp_server(handler)
+    log_path = str(tmp_path / "sent.jsonl")
+
+    first = _dispatch(port, _files(2), _recipients(4), log_path=log_path)
+    second = _dispatch(port, _files(4), _recipients(4), log_path=log_path)
+
+    assert sorted(first["sent"]) == ["OF0", "OF1"]
+    assert sorted(second["skipped"]) == ["OF0", "OF1"]
+    assert sorted(second["sent"]) == ["OF2", "OF3"]
+    assert len(handler.delivered) == 4
+    with open(log_path, encoding="utf-8") as f:
+        assert [json.loads(line)["abbreviation"] for line in f] == ["OF0", "OF1", "OF2", "OF3"]
+
+
+def test_unbuildable_message_fails_without_stalling_the_queue(smtp_server):
+    handler = Handler()
+    port = smtp_server(handler)
+    files = _files(12)
+    files[0] = ("OF0.html", b"\xff\xfe not utf-8")
+
+    summary = _dispatch(port, files, _recipients(12), workers=1)
+
+    assert [failure["abbreviation"] for failure in summary["failed"]] == ["OF0"]
+    assert "UnicodeDecodeError" in summary["failed"][0]["error"]
+    assert len(summary["sent"]) == 11
+
+
+def test_sender_is_required():
+    with pytest.raises(ValueError, match="sender"):
+        dispatch_newsletters(_files(1), _recipients(1), "127.0.0.1")
+
+
+def test_unwritable_send_log_fails_before_sending(smtp_server, tmp_path):
+    handler = Handler()
+    port = smtp_server(handler)
+    with pytest.raises(OSError):
+        _dispatch(port, _files(20), _recipients(20), log_path=str(tmp_path / "missing" / "sent.jsonl"))
+    assert handler.delivered == []
+
+
+def test_any_per_message_error_is_recorded_and_the_queue_drains(smtp_server, monkeypatch):
+    handler = Handler()
+    port = smtp_server(handler)
+    record = SendLog.record
+
+    def flaky_record(self, abbreviation, address):
+        if abbreviation == "OF3":
+            raise OSError("disk full")
+        record(self, abbreviation, address)
+
+    monkeypatch.setattr(SendLog, "record", flaky_record)
+    summary = _dispatch(port, _files(20), _recipients(20), workers=1)
+
+    assert [failure["abbreviation"] for failure in summary["failed"]] == ["OF3"]
+    assert summary["failed"][0]["error"] == "OSError: disk full"
+    assert len(summary["sent"]) == 19
@@ -0,0 +1,111 @@
+import pandas as pd
+
+from utils.matching import NameIndex, reconcile_inputs
+from utils.processor import compute_all_officer_stats
+
+
+def _caseload(rows):
+    return pd.DataFrame(rows, columns=["name", "function", "in-house caseload as at 01/04/2024"])
+
+
+def _ratings(rows):
+    return pd.DataFrame(
+        [[f"LAB/{i}", f"Applicant {i}", "N", name, score] for i, (name, score) in enumerate(rows)],
+        columns=["case ref no", "applicant", "assigned out indicator", "name", "overall"]
+    )
+
+
+PERIOD = {"date_start": "01/04/2024", "date_end": "30/06/2024"}
+
+
+def test_spelling_variants_are_mapped_onto_the_roster():
+    namelist_df = pd.DataFrame({
+        "name": ["Tan Wei Ling", "Rajesh Kumar"], "abbreviation": ["TWL", "RK"], "function": ["LO", "LE"]
+    })
+    case_df = _caseload([["TAN WEILING", "LO", 3], ["Kumar Rajesh", "LE", 4]])
+    ratings_df = pd.DataFrame({"name": ["tan  wei-ling", "Rajseh Kumar"], "score": [4, 5]})
+
+    case_df, ratings_df, report = reconcile_inputs(namelist_df, case_df, ratings_df)
+
+    assert case_df["name"].tolist() == ["Tan Wei Ling", "Rajesh Kumar"]
+    assert ratings_df["name"].tolist() == ["Tan Wei Ling", "Rajesh Kumar"]
+    assert set(report["method"]) == {"exact", "fuzzy"}
+
+
+def test_fuzzy_name_is_not_merged_into_an_exact_one():
+    # Lee Lin has left and is not on the roster; Lee Li is
+    namelist_df = pd.DataFrame({"name": ["Lee Li"], "abbreviation": ["LL"], "function": ["LO"]})
+    case_df = _caseload([["Lee Lin", "LO", 99], ["Lee Li", "LO", 5]])
+    ratings_df = _ratings([("Lee Lin", 1), ("Lee Li", 5)])
+
+    reconciled_case, reconciled_ratings, report = reconcile_inputs(namelist_df, case_df, ratings_df)
+
+    assert reconciled_case["name"].tolist() == ["Lee Lin", "Lee Li"]
+    assert reconciled_ratings["name"].tolist() == ["Lee Lin", "Lee Li"]
+    lee_lin = report[report["name"] == "Lee Lin"]
+    assert lee_lin["method"].tolist() == ["conflict", "conflict"]
+    assert lee_lin["canonical"].isna().all()
+
+    stats, = compute_all_officer_stats(namelist_df, reconciled_case, reconciled_ratings, PERIOD)
+    assert stats["inhouse_opening"] == 5
+    assert stats["survey_ratings"] == {"overall": 5}
+
+
+def test_two_fuzzy_names_for_one_officer_conflict():
+    namelist_df = pd.DataFrame({"name": ["Lee Li"], "abbreviation": ["LL"], "function": ["LO"]})
+    case_df = _caseload([["Lee Lin", "LO", 99], ["Lee Lii", "LO", 5]])
+    ratings_df = pd.DataFrame({"name": ["Lee Lin"], "score": [1]})
+
+    reconciled_case, reconciled_ratings, report = reconcile_inputs(namelist_df, case_df, ratings_df)
+
+    assert reconciled_case["name"].tolist() == ["Lee Lin", "Lee Lii"]
+    # A name that conflicts in case_load is left alone in ratings as well
+    assert reconciled_ratings["name"].tolist() == ["Lee Lin"]
+    assert report.set_index(["source", "name"])["method"].to_dict() == {
+        ("case_load.csv", "Lee Lin"): "conflict",
+        ("case_load.csv", "Lee Lii"): "conflict",
+        ("ratings.csv", "Lee Lin"): "conflict",
+    }
+
+
+def test_ratings_may_spell_one_officer_several_ways():
+    namelist_df = pd.DataFrame({"name": ["Tan Wei Ling"], "abbreviation": ["TWL"], "function": ["LO"]})
+    case_df = _caseload([["Tan Wei Ling", "LO", 3]])
+    ratings_df = _ratings([("Tan Wei Ling", 5), ("Tan Weiling", 4), ("Tan Wei-Lng", 3)])
+
+    _, reconciled_ratings, report = reconcile_inputs(namelist_df, case_df, ratings_df)
+
+    assert reconciled_ratings["name"].tolist() == ["Tan Wei Ling"] * 3
+    ratings_report = report[report["source"] == "ratings.csv"].set_index("name")
+    assert ratings_report["method"].to_dict() == {
+        "Tan Wei Ling": "exact", "Tan Weiling": "exact", "Tan Wei-Lng": "fuzzy"
+    }
+
+    stats, = compute_all_officer_stats(namelist_df, case_df, reconciled_ratings, PERIOD)
+    assert stats["survey_ratings"] == {"overall": 4.0}
+
+
+def test_spacing_only_variants_are_exact_in_case_load():
+    namelist_df = pd.DataFrame({"name": ["Tan Wei Ling"], "abbreviation": ["TWL"], "function": ["LO"]})
+    case_df = _caseload([["Tan Weiling", "LO", 3]])
+    reconciled_case, _, report = reconcile_inputs(namelist_df, case_df, _ratings([]))
+
+    assert reconciled_case["name"].tolist() == ["Tan Wei Ling"]
+    assert report["method"].tolist() == ["exact"]
+
+
+def test_blank_names_stay_missing_when_names_are_rewritten():
+    namelist_df = pd.DataFrame({"name": ["Tan Wei Ling"], "abbreviation": ["TWL"], "function": ["LO"]})
+    case_df = _caseload([["TAN WEILING", "LO", 3], [None, "LO", 4]])
+
+    reconciled_case, _, _ = reconcile_inputs(namelist_df, case_df, _ratings([]))
+
+    assert reconciled_case["name"].dtype == case_df["name"].dtype
+    assert reconciled_case["name"].iloc[0] == "Tan Wei Ling"
+    assert pd.isna(reconciled_case["name"].iloc[1])
+
+
+def test_names_differing_in_digits_are_not_matched():
+    index = NameIndex(["Officer 12", "Officer 21"])
+    assert index.match("Officer 12") == ("Officer 12", 100, "exact")
+    assert index.match("Oficer 13")[2] == "unmatched"
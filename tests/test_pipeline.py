@@ -0,0 +1,98 @@
+import io
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from benchmarks.synthetic import generate
+from utils.data_loader import load_all_data
+from utils import renderer
+from utils.pipeline import GenerationJob
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    paths = generate(str(tmp_path_factory.mktemp("inputs")), officers=30, ratings=300)
+    with open(paths["ratings"], "rb") as ratings_file, \
+            open(paths["caseload"], "rb") as caseload_file, \
+            open(paths["namelist"], "rb") as namelist_file:
+        ratings_df, case_df, namelist_df, period = load_all_data(ratings_file, caseload_file, namelist_file)
+    return namelist_df, case_df, ratings_df, period
+
+
+def _run(inputs, **kwargs):
+    job = GenerationJob(*inputs, **kwargs).start()
+    job.join()
+    assert job.status == "done", job.error
+    return job
+
+
+def test_job_reports_per_newsletter_timings(inputs, tmp_path):
+    output_dir = str(tmp_path / "out")
+    job = _run(inputs, output_dir=output_dir)
+
+    assert len(job.files) == len(job.report_timings) == 30
+    assert sorted(os.listdir(output_dir)) == sorted(name for name, _ in job.files)
+    for (name, data), timing in zip(job.files, job.report_timings):
+        assert name == f"{timing['abbreviation']}.html"
+        assert timing["bytes"] == len(data)
+        assert not timing["cached"]
+        assert timing["render_seconds"] > 0 and timing["write_seconds"] > 0
+
+
+def test_cached_newsletters_have_no_render_time(inputs, tmp_path):
+    first = _run(inputs, cache_dir=str(tmp_path / "cache"))
+    second = _run(inputs, cache_dir=str(tmp_path / "cache"))
+
+    assert second.cache_summary == {"hits": 30, "misses": 0}
+    assert second.files == first.files
+    assert all(timing["cached"] and timing["render_seconds"] is None for timing in second.report_timings)
+    assert all(timing["write_seconds"] is None for timing in second.report_timings)
+
+
+def test_size_comparison_only_when_asked(inputs):
+    standard = _run(inputs)
+    compact = _run(inputs, compact="linked")
+    compared = _run(inputs, compact="linked", compare_size=True)
+
+    assert compact.size_comparison is None
+    assert "compare" not in compact.metrics
+    comparison = compared.size_comparison
+    assert comparison["standard_bytes"] == sum(len(data) for _, data in standard.files)
+    assert comparison["bytes"] == sum(len(data) for _, data in compact.files)
+    assert comparison["size_ratio"] == comparison["bytes"] / comparison["standard_bytes"] < 1
+
+
+def test_edited_template_is_rendered_and_cached_under_its_own_fingerprint(inputs, tmp_path, monkeypatch):
+    template_dir = tmp_path / "templates"
+    shutil.copytree(renderer.TEMPLATE_DIR, template_dir)
+    monkeypatch.setattr(renderer, "TEMPLATE_DIR", str(template_dir))
+    cache_dir = str(tmp_path / "cache")
+
+    before = _run(inputs, cache_dir=cache_dir)
+    template = template_dir / renderer.TEMPLATE_NAME
+    template.write_text(template.read_text(encoding="utf-8").replace("</body>", "EDITED</body>"),
+                        encoding="utf-8")
+    edited = _run(inputs, cache_dir=cache_dir)
+    again = _run(inputs, cache_dir=cache_dir)
+
+    assert before.cache_summary["misses"] == 30
+    assert edited.cache_summary == {"hits": 0, "misses": 30}
+    assert all(b"EDITED" in data for _, data in edited.files)
+    assert again.cache_summary == {"hits": 30, "misses": 0}
+    assert again.files == edited.files
+
+
+def test_zip_stays_spooled_until_read_and_is_released_on_close(inputs):
+    job = _run(inputs)
+
+    assert not isinstance(job.zip_file, bytes)
+    with zipfile.ZipFile(io.BytesIO(job.read_zip())) as archive:
+        assert archive.namelist() == [name for name, _ in job.files]
+
+    zip_file = job.zip_file
+    job.close()
+    assert zip_file.closed
+    assert job.zip_file is None
+    assert job.read_zip() == b""
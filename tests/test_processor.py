@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate
+from utils.data_loader import load_all_data, resolve_caseload_schema
+from utils.processor import compute_all_officer_stats, compute_officer_stats
+
+
+def _same(a, b):
+    """Equality for stats dicts, treating NaN as equal to NaN."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, (float, np.floating)) and isinstance(b, (float, np.floating)):
+        return (math.isnan(a) and math.isnan(b)) or a == b
+    return type(a) is type(b) and a == b
+
+
+@pytest.fixture(params=[False, True], ids=["standard", "lean"])
+def roster(request, tmp_path):
+    paths = generate(str(tmp_path), officers=40, ratings=600, seed=3)
+    with open(paths["ratings"], "rb") as ratings_file, \
+            open(paths["caseload"], "rb") as caseload_file, \
+            open(paths["namelist"], "rb") as namelist_file:
+        ratings_df, case_df, namelist_df, period = load_all_data(
+            ratings_file, caseload_file, namelist_file, lean=request.param
+        )
+    names = namelist_df["name"].astype(str).tolist()
+
+    # Duplicate caseload names: a later row (different case) with other figures
+    duplicate = case_df[case_df["name"] == names[0]].copy()
+    duplicate["name"] = names[0].upper()
+    duplicate.iloc[:, 2:] = duplicate.iloc[:, 2:] + 7
+    case_df = pd.concat([case_df, duplicate], ignore_index=True)
+
+    # Officers missing from the caseload, and one without any ratings
+    case_df = case_df[~case_df["name"].isin(names[1:3])].reset_index(drop=True)
+    ratings_df = ratings_df[ratings_df["name"] != names[3]].reset_index(drop=True)
+
+    # A caseload row with no function, and an officer whose function has no group
+    function = case_df["function"].astype(object)
+    function[case_df["name"] == names[4]] = np.nan
+    case_df["function"] = function.astype(case_df["function"].dtype)
+    namelist_df = namelist_df.copy()
+    namelist_df["function"] = namelist_df["function"].astype(object)
+    namelist_df.loc[5, "function"] = "LA"
+    return namelist_df, case_df, ratings_df, period
+
+
+def test_compute_all_officer_stats_matches_per_officer(roster):
+    namelist_df, case_df, ratings_df, period = roster
+    schema = resolve_caseload_schema(case_df.columns, period)
+
+    batch = compute_all_officer_stats(namelist_df, case_df, ratings_df, period, schema)
+    per_officer = [
+        compute_officer_stats(officer_row, case_df, ratings_df, period, schema)
+        for _, officer_row in namelist_df.iterrows()
+    ]
+
+    assert len(batch) == len(per_officer) == len(namelist_df)
+    for expected, actual in zip(per_officer, batch):
+        assert _same(expected, actual), expected["abbreviation"]
+
+
+def test_compute_all_officer_stats_resolves_schema(roster):
+    namelist_df, case_df, ratings_df, period = roster
+    schema = resolve_caseload_schema(case_df.columns, period)
+    assert _same(
+        compute_all_officer_stats(namelist_df, case_df, ratings_df, period),
+        compute_all_officer_stats(namelist_df, case_df, ratings_df, period, schema),
+    )
@@ -1,7 +1,31 @@
+import codecs
+import csv
+import importlib.util
+import io
+import logging
+import operator
+import zipfile
 import pandas as pd
+import numpy as np
 import re
+from dataclasses import dataclass, field
 from datetime import datetime
-from utils.encoding import detect_encoding # Assuming this import path is correct
+from itertools import islice
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from utils.encoding import detect_encoding_info
+
+logger = logging.getLogger(__name__)
+
+
+def _detect_encoding(file, label):
+    info = detect_encoding_info(file)
+    logger.info(
+        "%s: encoding %s (confidence %.2f via %s) in %.3fs",
+        label, info['encoding'], info['confidence'], info['method'], info['seconds']
+    )
+    return info['encoding']
+
 
 def extract_dates_from_columns(columns):
     start_date, end_date = None, None
@@ -27,38 +51,462 @@ def extract_dates_from_columns(columns):
     raise ValueError("Could not find the two required 'Total Caseload as at DD/MM/YYYY' columns.")
 
 
-def detect_header_and_load_csv(file):
-    encoding = detect_encoding(file)
-    file.seek(0)
-    for skip in range(0, 15):
-        try:
-            df = pd.read_csv(file, skiprows=skip, encoding=encoding)
-            # IMPORTANT CHANGE: Convert columns to lowercase and strip whitespace
-            df.columns = df.columns.map(str).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip() # MODIFIED LINE
-            if 'name' in df.columns: # Check for lowercase 'name' now
-                return df
-        except Exception:
+# ratings.csv columns that describe the case rather than answer a survey question
+RATINGS_METADATA_COLS = {
+    'case ref no', 'subject matter', 'mto',
+    'assigned out indicator', 'applicant', 'abbreviation', 'name', 'type'
+}
+# Metadata the processor never reads; lean loading skips these columns
+UNUSED_RATINGS_COLS = {'subject matter', 'mto', 'abbreviation', 'type'}
+# Low-cardinality text columns stored as categoricals when loading lean
+CATEGORY_COLS = {'name', 'function', 'assigned out indicator'}
+# Rows read with default dtypes to estimate what lean loading saved
+FOOTPRINT_SAMPLE_ROWS = 2000
+
+
+# Logical caseload metrics → header template (after lowercasing and whitespace
+# normalisation). {start}/{end} are filled in from the period once per upload.
+CASELOAD_METRICS = {
+    "inhouse_opening": "in-house caseload as at {start}",
+    "inhouse_added": "additional in-house cases between {start} to {end}",
+    "inhouse_nfa_712": "in-house cases nfa- 07 and nfa-12 between {start} to {end}",
+    "inhouse_nfa_others": "in-house cases nfa- others between {start} to {end}",
+    "inhouse_end": "in-house caseload as at {end}",
+    "increase_decrease_inhouse": "increase /decrease of cases",
+    "clearance_rate_inhouse": None,  # resolved positionally, see _resolve_clearance_rates
+    "assigned_opening": "assigned caseload as at {start}",
+    "assigned_added": "additional assigned cases between {start} to {end}",
+    "assigned_nfa_712": "assigned cases nfa- 07 between {start} to {end}",
+    "assigned_nfa_others": "assigned cases nfa- others between {start} to {end}",
+    "assigned_end": "assigned caseload as at {end}",
+    "increase_decrease_assigned": "increase/ decrease of cases",
+    "clearance_rate_assigned": None,  # resolved positionally, see _resolve_clearance_rates
+    "total_start": "total caseload as at {start}",
+    "total_end": "total caseload as at {end}",
+    "total_nfa_ed": "total cases nfa-ed",
+    "pct_change_overall": "% increase or decrease",
+}
+
+CLEARANCE_RATE_PATTERN = re.compile(r"clearance rate \(%\)(\.\d+)?")
+
+
+@dataclass(frozen=True)
+class CaseloadSchema:
+    """
+    Resolved mapping of logical caseload metrics to column positions in
+    caseload_df. index_map is aligned with CASELOAD_METRICS and holds -1 for
+    metrics whose column is absent from the upload.
+    """
+    period: dict
+    positions: dict
+    index_map: np.ndarray = field(repr=False)
+    missing: tuple = ()
+
+    def position(self, metric):
+        return self.positions.get(metric)
+
+    def has(self, metric):
+        return metric in self.positions
+
+
+def _resolve_clearance_rates(columns, positions):
+    """
+    case_load.csv has two identically named "Clearance rate (%)" columns,
+    which pandas de-duplicates to "clearance rate (%)" and
+    "clearance rate (%).1". Rather than rely on that suffix, assign each
+    column to the in-house or assigned block by where it sits relative to
+    the assigned-caseload opening column, falling back to header order.
+    """
+    candidates = [i for i, col in enumerate(columns) if CLEARANCE_RATE_PATTERN.fullmatch(col)]
+    boundary = positions.get("assigned_opening")
+    if boundary is None:
+        inhouse, assigned = (candidates + [None, None])[:2]
+    else:
+        inhouse = next((i for i in candidates if i < boundary), None)
+        assigned = next((i for i in candidates if i > boundary), None)
+    resolved = {}
+    if inhouse is not None:
+        resolved["clearance_rate_inhouse"] = inhouse
+    if assigned is not None:
+        resolved["clearance_rate_assigned"] = assigned
+    return resolved
+
+
+def resolve_caseload_schema(columns, period):
+    """
+    Resolve CASELOAD_METRICS against the (normalised) caseload_df columns for
+    the given period. Call once per upload and pass the result to the
+    processor; missing metrics are listed on the returned schema.
+    """
+    columns = list(columns)
+    lookup = {}
+    for i, col in enumerate(columns):
+        lookup.setdefault(col, i)
+
+    positions = {}
+    for metric, template in CASELOAD_METRICS.items():
+        if template is None:
             continue
-    raise ValueError("Could not parse CSV file with known headers.")
+        header = template.format(start=period["date_start"], end=period["date_end"])
+        if header in lookup:
+            positions[metric] = lookup[header]
+    positions.update(_resolve_clearance_rates(columns, positions))
+
+    index_map = np.array([positions.get(metric, -1) for metric in CASELOAD_METRICS], dtype=np.intp)
+    missing = tuple(metric for metric in CASELOAD_METRICS if metric not in positions)
+    return CaseloadSchema(period=period, positions=positions, index_map=index_map, missing=missing)
+
+
+def normalise_columns(columns):
+    """Lowercase headers and collapse/strip whitespace so lookups are stable."""
+    return pd.Index(columns).map(str).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def _is_header(cells):
+    return 'name' in normalise_columns(cells)
+
+
+def sniff_header_row(file, encoding, max_rows=15, sniff_bytes=64 * 1024):
+    """
+    Read only the start of the file once and return (header_row, header_cells)
+    for the first of the first max_rows rows that contains a 'name' column.
+    Rows are CSV records: a quoted newline stays inside its record, blank
+    lines count, and \n, \r\n and bare \r line endings are all accepted.
+    Rewinds the file before returning.
+    """
+    file.seek(0)
+    head = file.read(sniff_bytes)
+    file.seek(0)
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(head)
+    if len(head) == sniff_bytes:
+        # The last record may have been cut mid-way
+        text = text[:max(text.rfind('\n'), text.rfind('\r')) + 1]
+
+    records = csv.reader(io.StringIO(text, newline=''))
+    for row_number, cells in enumerate(islice(records, max_rows)):
+        if _is_header(cells):
+            return row_number, cells
+    raise ValueError(
+        f"Could not find a header row with a 'Name' column in the first {max_rows} rows."
+    )
+
+
+def detect_header_and_load_csv(file, lean=False):
+    encoding = _detect_encoding(file, "case_load.csv")
+    header_row, header_cells = sniff_header_row(file, encoding)
+    logger.info("case_load.csv: header found on row %d", header_row + 1)
+
+    # Skip blank header cells (trailing commas in the export) and keep the
+    # identifying columns as strings (function as a categorical when lean).
+    # The C engine is kept here: the caseload file is small and its duplicated
+    # "Clearance rate (%)" headers must be de-duplicated the usual way.
+    usecols = [i for i, cell in enumerate(header_cells) if cell.strip()]
+    normalised = normalise_columns(header_cells)
+    dtype = {
+        header_cells[i]: "category" if lean and col == 'function' else str
+        for i, col in enumerate(normalised)
+        if col in ('name', 'function')
+    }
+
+    # Skip the preamble with the same csv.reader that found the header:
+    # read_csv's skiprows counts runs of bare \r line endings differently.
+    text = io.TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        records = csv.reader(text)
+        for _ in range(header_row):
+            next(records)
+        df = pd.read_csv(text, usecols=usecols, dtype=dtype)
+    finally:
+        text.detach()
+    df.columns = normalise_columns(df.columns)
+    df.attrs['header_row'] = header_row
+    return df
+
+
+# .xlsx workbooks are ZIP archives; anything else is parsed as CSV
+XLSX_SIGNATURE = b"PK\x03\x04"
+# Rows held as Python objects before being packed into a DataFrame chunk
+XLSX_CHUNK_ROWS = 50_000
+
+
+def is_xlsx(file):
+    """True if file starts with the ZIP signature of an .xlsx workbook. Rewinds the file."""
+    file.seek(0)
+    signature = file.read(len(XLSX_SIGNATURE))
+    file.seek(0)
+    return signature == XLSX_SIGNATURE
+
+
+def sniff_xlsx_header(workbook, max_rows=15):
+    """
+    Return (worksheet, header_row, header_cells) for the first worksheet with
+    a 'name' column in its first max_rows rows. Only those rows are parsed.
+    """
+    for worksheet in workbook.worksheets:
+        for row_number, row in enumerate(islice(worksheet.iter_rows(values_only=True), max_rows)):
+            cells = ["" if cell is None else str(cell) for cell in row]
+            if _is_header(cells):
+                return worksheet, row_number, cells
+    raise ValueError(
+        f"Could not find a header row with a 'Name' column in the first {max_rows} rows of any worksheet."
+    )
 
 
-def load_all_data(ratings_file, caseload_file, namelist_file):
+def _dedupe_columns(names):
+    """Rename repeated headers "x", "x.1", "x.2", … the way read_csv does."""
+    counts = {}
+    deduped = []
+    for name in names:
+        count = counts.get(name, 0)
+        while count:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        counts[name] = count + 1
+        deduped.append(name)
+    return deduped
+
+
+def _as_text(series):
+    """
+    Cast to the text dtype read_csv gives dtype=str columns, leaving blank
+    cells missing: before pandas 3, astype(str) spells them 'None'/'nan'.
+    """
+    text = series.astype("str")
+    if text.dtype == object:
+        text = text.mask(series.isna())
+    return text
+
+
+def _infer_column(series):
+    """
+    Give a column assembled from worksheet cells the dtype read_csv would
+    infer: chunks that disagreed (or held only blanks) come back as object.
+    """
+    if series.dtype != object:
+        return series
+    try:
+        return pd.to_numeric(series)
+    except (TypeError, ValueError):
+        pass
+    if series.dropna().map(type).eq(str).all():
+        return _as_text(series)
+    return series
+
+
+def read_xlsx(file, usecols=None, chunk_rows=XLSX_CHUNK_ROWS, max_header_rows=15, nrows=None):
+    """
+    Stream a table out of an .xlsx workbook with openpyxl's read-only,
+    values-only mode, so the workbook is never loaded as a DOM. The header is
+    the first row with a 'name' column in the first max_header_rows rows of
+    any worksheet (see sniff_xlsx_header); rows below it are packed into
+    DataFrame chunks of chunk_rows, which bounds the cell objects alive at
+    once. usecols, if given, is called with each normalised header and
+    selects the columns to keep; blank header cells are always dropped.
+    nrows, like read_csv's, stops after that many rows.
+
+    Returns a DataFrame with the raw (de-duplicated) headers and the
+    header_row and sheet_name in df.attrs.
+    """
+    file.seek(0)
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ValueError(f"Not a readable .xlsx workbook: {e}") from e
+
+    try:
+        worksheet, header_row, header_cells = sniff_xlsx_header(workbook, max_header_rows)
+        names = _dedupe_columns([cell.strip() for cell in header_cells])
+        normalised = normalise_columns(names)
+        positions = [
+            i for i, (name, col) in enumerate(zip(names, normalised))
+            if name and (usecols is None or usecols(col))
+        ]
+        columns = [names[i] for i in positions]
+        pick = operator.itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+        width = max(positions) + 1
+
+        chunks = []
+        rows = []
+        read = 0
+        for row in worksheet.iter_rows(min_row=header_row + 2, values_only=True):
+            if read == nrows:
+                break
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            values = pick(row)
+            if any(value is not None for value in values):  # read_csv skips blank lines
+                rows.append(values)
+                read += 1
+            if len(rows) == chunk_rows:
+                chunks.append(pd.DataFrame.from_records(rows, columns=columns))
+                rows = []
+        if rows or not chunks:
+            chunks.append(pd.DataFrame.from_records(rows, columns=columns))
+        sheet_name = worksheet.title
+    finally:
+        workbook.close()
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    df = pd.DataFrame({col: _infer_column(df[col]) for col in df.columns}, columns=df.columns)
+    df.attrs['header_row'] = header_row
+    df.attrs['sheet_name'] = sheet_name
+    return df
+
+
+def detect_header_and_load_xlsx(file, lean=False):
+    df = read_xlsx(file)
+    logger.info("case_load.xlsx: header found on row %d of sheet '%s'",
+                df.attrs['header_row'] + 1, df.attrs['sheet_name'])
+    attrs = dict(df.attrs)
+    df.columns = normalise_columns(df.columns)
+    # Same identifying-column dtypes as detect_header_and_load_csv
+    for col in ('name', 'function'):
+        if col in df.columns:
+            df[col] = _as_text(df[col])
+            if lean and col == 'function':
+                df[col] = df[col].astype("category")
+    df.attrs.update(attrs)
+    return df
+
+
+def csv_engine():
+    """pandas' pyarrow CSV engine when pyarrow is installed, else the C engine."""
+    return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+
+def memory_footprint(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def estimate_default_footprint(file, rows, encoding=None, sample_rows=FOOTPRINT_SAMPLE_ROWS):
+    """
+    Estimate the memory a rows-long ratings or namelist table would take
+    loaded without lean, i.e. every column with default dtypes, by scaling
+    up the footprint of its first sample_rows rows. encoding is needed for
+    CSV input. Rewinds the file.
+    """
+    if is_xlsx(file):
+        sample = read_xlsx(file, nrows=sample_rows)
+    else:
+        file.seek(0)
+        sample = pd.read_csv(file, encoding=encoding, nrows=sample_rows)
+    file.seek(0)
+    if sample.empty:
+        return memory_footprint(sample)
+    return int(memory_footprint(sample) / len(sample) * rows)
+
+
+def _lean_dtypes(raw_columns, numeric_dtype=None):
+    """dtype hints: categoricals for CATEGORY_COLS, numeric_dtype for survey answers."""
+    dtype = {}
+    for raw, col in zip(raw_columns, normalise_columns(raw_columns)):
+        if col in CATEGORY_COLS:
+            dtype[raw] = "category"
+        elif numeric_dtype and col not in RATINGS_METADATA_COLS:
+            dtype[raw] = numeric_dtype
+    return dtype
+
+
+def read_ratings_csv(file, encoding, lean=False):
+    """
+    Read ratings.csv. In lean mode only the columns the processor uses are
+    read, names and the assigned-out indicator become categoricals, survey
+    answers become float32, and the pyarrow engine is used when available.
+    """
+    if not lean:
+        return pd.read_csv(file, encoding=encoding)
+
+    header = list(pd.read_csv(file, encoding=encoding, nrows=0).columns)
+    file.seek(0)
+    usecols = [
+        raw for raw, col in zip(header, normalise_columns(header))
+        if col not in UNUSED_RATINGS_COLS
+    ]
+    return pd.read_csv(
+        file, encoding=encoding, usecols=usecols,
+        dtype=_lean_dtypes(usecols, numeric_dtype="float32"), engine=csv_engine()
+    )
+
+
+def read_namelist_csv(file, encoding, lean=False):
+    if not lean:
+        return pd.read_csv(file, encoding=encoding)
+    header = list(pd.read_csv(file, encoding=encoding, nrows=0).columns)
+    file.seek(0)
+    return pd.read_csv(file, encoding=encoding, dtype=_lean_dtypes(header), engine=csv_engine())
+
+
+def read_ratings_xlsx(file, lean=False):
+    """.xlsx counterpart of read_ratings_csv, with the same lean pruning and dtypes."""
+    usecols = (lambda col: col not in UNUSED_RATINGS_COLS) if lean else None
+    df = read_xlsx(file, usecols=usecols)
+    if lean:
+        df = df.astype(_lean_dtypes(df.columns, numeric_dtype="float32"))
+    return df
+
+
+def read_namelist_xlsx(file, lean=False):
+    df = read_xlsx(file)
+    if lean:
+        df = df.astype(_lean_dtypes(df.columns))
+    return df
+
+
+def load_all_data(ratings_file, caseload_file, namelist_file, lean=False):
+    """
+    Load and normalise the three uploads. Returns
+    (ratings_df, caseload_df, namelist_df, period).
+
+    Each input may be a CSV or an .xlsx workbook (recognised by its content,
+    not its name); workbooks are streamed with read_xlsx and give the same
+    frames as the equivalent CSV export.
+
+    lean=True prunes unused ratings columns and uses compact dtypes (see
+    read_ratings_csv) to cut memory on large exports. Each frame's memory
+    footprint is logged either way; with lean, the default-dtype size of
+    ratings and namelist is also estimated from a sample of their rows (see
+    estimate_default_footprint) and the saving is logged.
+    """
     # Load ratings.csv
-    ratings_encoding = detect_encoding(ratings_file)
-    ratings_df = pd.read_csv(ratings_file, encoding=ratings_encoding)
+    ratings_encoding = namelist_encoding = None
+    if is_xlsx(ratings_file):
+        ratings_df = read_ratings_xlsx(ratings_file, lean=lean)
+    else:
+        ratings_encoding = _detect_encoding(ratings_file, "ratings.csv")
+        ratings_df = read_ratings_csv(ratings_file, ratings_encoding, lean=lean)
     # IMPORTANT CHANGE: Convert columns to lowercase and strip whitespace for ratings_df
-    ratings_df.columns = ratings_df.columns.map(str).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip() # MODIFIED LINE
+    ratings_df.columns = normalise_columns(ratings_df.columns)
 
     # Load namelist.csv
-    namelist_encoding = detect_encoding(namelist_file)
-    namelist_df = pd.read_csv(namelist_file, encoding=namelist_encoding)
+    if is_xlsx(namelist_file):
+        namelist_df = read_namelist_xlsx(namelist_file, lean=lean)
+    else:
+        namelist_encoding = _detect_encoding(namelist_file, "namelist.csv")
+        namelist_df = read_namelist_csv(namelist_file, namelist_encoding, lean=lean)
     # IMPORTANT CHANGE: Convert columns to lowercase and strip whitespace for namelist_df
-    namelist_df.columns = namelist_df.columns.str.lower().str.replace(r'\s+', ' ', regex=True).str.strip() # MODIFIED LINE
+    namelist_df.columns = normalise_columns(namelist_df.columns)
 
     # Load case_load.csv using the helper function
-    caseload_df = detect_header_and_load_csv(caseload_file)
-    # The detect_header_and_load_csv function now handles lowercasing and stripping for caseload_df
+    if is_xlsx(caseload_file):
+        caseload_df = detect_header_and_load_xlsx(caseload_file, lean=lean)
+    else:
+        caseload_df = detect_header_and_load_csv(caseload_file, lean=lean)
+    # Both helpers also lowercase and strip caseload_df's columns
 
     period = extract_dates_from_columns(caseload_df.columns)
 
+    for label, df in (("ratings.csv", ratings_df), ("case_load.csv", caseload_df),
+                      ("namelist.csv", namelist_df)):
+        logger.info("%s: %d rows, %.1f MiB in memory (lean=%s)",
+                    label, len(df), memory_footprint(df) / 2 ** 20, lean)
+    if lean:
+        # case_load has one row per officer, so lean changes little there
+        for label, file, encoding, df in (("ratings.csv", ratings_file, ratings_encoding, ratings_df),
+                                          ("namelist.csv", namelist_file, namelist_encoding, namelist_df)):
+            default = estimate_default_footprint(file, len(df), encoding)
+            footprint = memory_footprint(df)
+            logger.info("%s: about %.1f MiB with default dtypes, so lean saved about %.0f%%",
+                        label, default / 2 ** 20, 100 * (1 - footprint / default) if default else 0)
+
     return ratings_df, caseload_df, namelist_df, period
@@ -1,7 +1,95 @@
-import chardet
+import codecs
+from time import perf_counter
 
-def detect_encoding(file):
-    raw = file.read()
+from chardet import UniversalDetector
+
+# How much of the file chardet may look at when the file is not UTF-8.
+DEFAULT_SAMPLE_SIZE = 256 * 1024
+# Chunk size for the strict UTF-8 pass and for feeding chardet.
+CHUNK_SIZE = 64 * 1024
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _is_utf8(file, first_chunk):
+    """
+    Strictly decode the whole stream as UTF-8, chunk by chunk. Returns
+    (True, None) on success, or (False, failing_chunk) on the first error.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='strict')
+    chunk = first_chunk
+    while chunk:
+        try:
+            decoder.decode(chunk)
+        except UnicodeDecodeError:
+            return False, chunk
+        chunk = file.read(CHUNK_SIZE)
+    try:
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False, first_chunk
+    return True, None
+
+
+def detect_encoding_info(file, sample_size=DEFAULT_SAMPLE_SIZE, min_confidence=0.9):
+    """
+    Detect the text encoding of a binary file-like object and rewind it.
+
+    Tries, in order: a byte-order mark, a strict UTF-8 decode of the stream,
+    and finally chardet's UniversalDetector fed at most sample_size bytes
+    (stopping as soon as it is at least min_confidence sure). Returns a dict
+    with 'encoding', 'confidence', 'method' and 'seconds'.
+    """
+    started = perf_counter()
     file.seek(0)
-    result = chardet.detect(raw)
-    return result['encoding'] if result['encoding'] else 'utf-8'
+    head = file.read(CHUNK_SIZE)
+
+    def result(encoding, confidence, method):
+        file.seek(0)
+        return {
+            'encoding': encoding,
+            'confidence': confidence,
+            'method': method,
+            'seconds': perf_counter() - started
+        }
+
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return result(encoding, 1.0, 'bom')
+
+    utf8, failing_chunk = _is_utf8(file, head)
+    if utf8:
+        return result('utf-8', 1.0, 'utf-8')
+
+    # Not UTF-8: let chardet look at the bytes that broke the UTF-8 decode
+    # (the prefix alone may be plain ASCII) and then a bounded prefix.
+    detector = UniversalDetector()
+    detector.feed(failing_chunk)
+    file.seek(0)
+    fed = len(failing_chunk)
+    while fed < sample_size and not detector.done:
+        chunk = file.read(min(CHUNK_SIZE, sample_size - fed))
+        if not chunk:
+            break
+        detector.feed(chunk)
+        fed += len(chunk)
+        if (detector.result or {}).get('confidence', 0) >= min_confidence:
+            break
+    detector.close()
+
+    encoding = detector.result.get('encoding')
+    confidence = detector.result.get('confidence') or 0.0
+    if not encoding or encoding.lower() in ('ascii', 'utf-8'):
+        # Non-UTF-8 bytes exist, so ASCII/UTF-8 guesses would fail to decode.
+        return result('latin-1', confidence, 'fallback')
+    return result(encoding, confidence, 'chardet')
+
+
+def detect_encoding(file):
+    return detect_encoding_info(file)['encoding']
@@ -0,0 +1,100 @@
+import asyncio
+import os
+from time import perf_counter
+
+
+PDF_OPTIONS = {"format": "A4", "printBackground": True}
+PNG_OPTIONS = {"fullPage": True, "type": "png"}
+DEFAULT_LAUNCH_ARGS = ["--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage"]
+
+
+async def _launch_browser(executable_path=None):
+    try:
+        from pyppeteer import launch
+    except ImportError as e:
+        raise ImportError("PDF/PNG export needs pyppeteer: pip install pyppeteer") from e
+    options = {"headless": True, "args": DEFAULT_LAUNCH_ARGS}
+    if executable_path:
+        options["executablePath"] = executable_path
+    return await launch(options)
+
+
+async def _export_one(page, name, html, formats):
+    stem = os.path.splitext(name)[0]
+    if isinstance(html, bytes):
+        html = html.decode("utf-8")
+    await page.setContent(html)
+    exported = []
+    if "pdf" in formats:
+        exported.append((f"{stem}.pdf", await page.pdf(PDF_OPTIONS)))
+    if "png" in formats:
+        exported.append((f"{stem}.png", await page.screenshot(PNG_OPTIONS)))
+    return exported
+
+
+async def export_newsletters_async(files, formats=("pdf",), pool_size=4,
+                                   executable_path=None, browser=None):
+    """
+    Convert rendered newsletters to PDF and/or PNG in one headless Chromium.
+
+    files is an iterable of (name, html) pairs, e.g. from
+    renderer.iter_newsletter_files; html may be str or UTF-8 bytes and is fed
+    to the page directly, without a file round trip. pool_size long-lived
+    pages are opened once and reused, which also bounds concurrency.
+
+    Pass browser to reuse an already-launched pyppeteer browser (or any
+    object with async newPage()/close() whose pages provide setContent, pdf
+    and screenshot); it is then left open. Returns (exported, timings), where
+    exported is a list of (name, bytes) in input order and timings holds the
+    per-document export seconds.
+
+    A document that fails to export fails the whole batch: the remaining
+    documents are cancelled, every page is closed and the exception is
+    raised, so no partial results are returned.
+    """
+    files = list(files)
+    owns_browser = browser is None
+    if owns_browser:
+        browser = await _launch_browser(executable_path)
+
+    pages = asyncio.Queue()
+    try:
+        for _ in range(max(1, min(pool_size, len(files)))):
+            pages.put_nowait(await browser.newPage())
+
+        async def export(name, html):
+            page = await pages.get()
+            started = perf_counter()
+            try:
+                return await _export_one(page, name, html, formats), perf_counter() - started
+            finally:
+                pages.put_nowait(page)
+
+        tasks = [asyncio.ensure_future(export(name, html)) for name, html in files]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Let in-flight documents hand their pages back before closing them
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    finally:
+        while not pages.empty():
+            await pages.get_nowait().close()
+        if owns_browser:
+            await browser.close()
+
+    exported = [item for document, _ in results for item in document]
+    timings = [
+        {"name": name, "export_seconds": seconds}
+        for (name, _), (_, seconds) in zip(files, results)
+    ]
+    return exported, timings
+
+
+def export_newsletters(files, formats=("pdf",), pool_size=4, executable_path=None):
+    """Synchronous wrapper around export_newsletters_async."""
+    return asyncio.run(export_newsletters_async(
+        files, formats=formats, pool_size=pool_size, executable_path=executable_path
+    ))
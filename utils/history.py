@@ -0,0 +1,136 @@
+import math
+import sqlite3
+from datetime import datetime
+
+
+# Per-officer figures kept for each period, taken from the stats dicts
+HISTORY_METRICS = (
+    "inhouse_opening", "inhouse_end", "assigned_opening", "assigned_end",
+    "total_start", "total_end", "total_nfa_ed", "pct_change_overall",
+    "clearance_rate_inhouse", "clearance_rate_assigned", "survey_average",
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS officer_stats (
+    abbreviation TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    period_end   TEXT NOT NULL,
+    name         TEXT,
+    function     TEXT,
+    {", ".join(f"{metric} REAL" for metric in HISTORY_METRICS)},
+    PRIMARY KEY (abbreviation, period_end, period_start)
+);
+CREATE INDEX IF NOT EXISTS officer_stats_period ON officer_stats (period_end);
+"""
+
+
+def _iso(date_text):
+    return datetime.strptime(date_text, "%d/%m/%Y").strftime("%Y-%m-%d")
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _survey_average(report):
+    scores = [_number(score) for score in report.get("survey_ratings", {}).values()]
+    scores = [score for score in scores if score is not None]
+    return round(sum(scores) / len(scores), 2) if scores else None
+
+
+def connect(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record_period(db_path, all_reports):
+    """
+    Append one row per report for its period in a single transaction.
+    Re-recording the same officer and period replaces the earlier row, so a
+    corrected upload of a quarter wins; other periods are never touched.
+    """
+    rows = []
+    for report in all_reports:
+        values = {metric: _number(report.get(metric)) for metric in HISTORY_METRICS}
+        values["survey_average"] = _survey_average(report)
+        rows.append((
+            str(report["abbreviation"]),
+            _iso(report["period"]["date_start"]),
+            _iso(report["period"]["date_end"]),
+            report["name"],
+            report["function"],
+            *(values[metric] for metric in HISTORY_METRICS),
+        ))
+
+    columns = ("abbreviation", "period_start", "period_end", "name", "function") + HISTORY_METRICS
+    connection = connect(db_path)
+    try:
+        with connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO officer_stats ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows
+            )
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def load_history(db_path, abbreviations, periods=4, before=None):
+    """
+    Fetch up to `periods` most recent recorded periods for every abbreviation
+    in one query. `before` is a "DD/MM/YYYY" period end; only periods ending
+    earlier are returned (pass the current period's date_end to get the
+    previous quarters). Returns {abbreviation: [row dict, newest first]}.
+    """
+    abbreviations = [str(abbreviation) for abbreviation in abbreviations]
+    history = {abbreviation: [] for abbreviation in abbreviations}
+    if not abbreviations:
+        return history
+
+    connection = connect(db_path)
+    connection.row_factory = sqlite3.Row
+    try:
+        connection.execute("CREATE TEMP TABLE wanted (abbreviation TEXT PRIMARY KEY)")
+        connection.executemany(
+            "INSERT OR IGNORE INTO wanted VALUES (?)", ((a,) for a in abbreviations)
+        )
+        rows = connection.execute(
+            """
+            SELECT * FROM (
+                SELECT s.*, ROW_NUMBER() OVER (
+                    PARTITION BY s.abbreviation ORDER BY s.period_end DESC, s.period_start DESC
+                ) AS recency
+                FROM officer_stats s JOIN wanted w ON w.abbreviation = s.abbreviation
+                WHERE s.period_end < ?
+            )
+            WHERE recency <= ?
+            ORDER BY abbreviation, recency
+            """,
+            (_iso(before) if before else "9999-12-31", periods)
+        ).fetchall()
+    finally:
+        connection.close()
+
+    for row in rows:
+        entry = dict(row)
+        entry.pop("recency")
+        entry["period_end_display"] = datetime.strptime(entry["period_end"], "%Y-%m-%d").strftime("%d/%m/%Y")
+        history[entry["abbreviation"]].append(entry)
+    return history
+
+
+def attach_history(all_reports, history):
+    """
+    Add each officer's previous periods to their stats dict as 'history',
+    along with this period's 'survey_average' for the trend table.
+    """
+    for report in all_reports:
+        report["history"] = history.get(str(report["abbreviation"]), [])
+        report["survey_average"] = _survey_average(report)
+    return all_reports
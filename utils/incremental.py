@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import resolve_caseload_schema
+from utils.processor import function_group_averages
+from utils.renderer import read_template_sources
+
+# Bump when processor/renderer output changes for identical inputs, so
+# previously cached newsletters are not reused.
+FINGERPRINT_VERSION = "2"
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def template_fingerprint(compact=None, sources=None):
+    """Hash of the template and stylesheet text in sources (see renderer.TemplateSources) and the mode."""
+    sources = sources or read_template_sources()
+    return _digest(FINGERPRINT_VERSION, compact or "standard", sources.html, sources.css)
+
+
+def officer_fingerprints(namelist_df, case_df, ratings_df, period, schema=None, compact=None,
+                         sources=None):
+    """
+    One content hash per namelist_df row covering everything that officer's
+    newsletter depends on: their roster row, their caseload row, their
+    ratings rows, their function group's averages, the period, the template
+    and stylesheet, and the output mode (compact). Pass the sources the
+    newsletters will be rendered with, so each fingerprint names exactly the
+    template version behind the cached page. Returns a list of hex digests
+    in namelist_df row order.
+    """
+    if schema is None:
+        schema = resolve_caseload_schema(case_df.columns, period)
+
+    shared = _digest(
+        template_fingerprint(compact, sources),
+        json.dumps(period, sort_keys=True),
+        list(case_df.columns),
+        list(ratings_df.columns),
+    )
+
+    # Caseload: hash of the officer's first matching row
+    case_names = case_df["name"].str.lower()
+    case_hashes = _row_hashes(case_df)
+    first_rows = case_names.notna() & ~case_names.duplicated()
+    case_by_name = dict(zip(case_names[first_rows], case_hashes[first_rows.to_numpy()]))
+
+    # Ratings: ordered hash of all the officer's rows
+    ratings_by_name = {}
+    if not ratings_df.empty:
+        codes, uniques = pd.factorize(ratings_df["name"].str.lower())
+        rating_hashes = _row_hashes(ratings_df)
+        order = np.argsort(codes, kind="stable")
+        for positions in np.split(order, np.flatnonzero(np.diff(codes[order])) + 1):
+            if len(positions) and codes[positions[0]] >= 0:
+                ratings_by_name[uniques[codes[positions[0]]]] = _digest(rating_hashes[positions].tobytes())
+
+    # Function groups: hash the rounded averages shown in the newsletter, so a
+    # correction that does not move any average leaves the group untouched
+    group_hashes = {
+        func: _digest(json.dumps({str(k): str(v) for k, v in averages.items()}, sort_keys=True))
+        for func, averages in function_group_averages(case_df, schema).items()
+    }
+
+    fingerprints = []
+    for name, abbreviation, function in zip(
+        namelist_df["name"], namelist_df["abbreviation"], namelist_df["function"]
+    ):
+        key = name.lower() if isinstance(name, str) else None
+        func = function.lower() if isinstance(function, str) else None
+        fingerprints.append(_digest(
+            shared, name, abbreviation, function,
+            case_by_name.get(key, "no-caseload"),
+            ratings_by_name.get(key, "no-ratings"),
+            group_hashes.get(func, "no-group"),
+        ))
+    return fingerprints
+
+
+def with_history(fingerprints, abbreviations, history):
+    """Fold each officer's trend rows (from utils.history.load_history) into their fingerprint."""
+    return [
+        _digest(fingerprint, json.dumps(history.get(str(abbreviation), []), sort_keys=True))
+        for fingerprint, abbreviation in zip(fingerprints, abbreviations)
+    ]
+
+
+class ArtifactCache:
+    """
+    Rendered newsletters stored by fingerprint under cache_dir/objects. A
+    fingerprint's file is present only once completely written, so several
+    processes or sessions can share one cache_dir.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _path(self, fingerprint):
+        return os.path.join(self.objects_dir, f"{fingerprint}.html")
+
+    def get(self, fingerprint):
+        try:
+            with open(self._path(fingerprint), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, fingerprint, data):
+        # A private temp file per writer; concurrent puts of the same
+        # fingerprint write identical bytes, so whichever replace lands last wins
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(fingerprint))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
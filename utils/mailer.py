@@ -0,0 +1,229 @@
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+
+DEFAULT_SUBJECT = "Your LAB Officer Newsletter"
+
+
+def recipients_from_namelist(namelist_df, email_column="email"):
+    """Map each officer's abbreviation to the address in namelist.csv's email column."""
+    if email_column not in namelist_df.columns:
+        raise ValueError(f"namelist.csv has no '{email_column}' column to send newsletters to.")
+    recipients = {}
+    for abbreviation, address in zip(namelist_df['abbreviation'], namelist_df[email_column]):
+        if isinstance(address, str) and address.strip():
+            recipients[abbreviation] = address.strip()
+    return recipients
+
+
+class SendLog:
+    """
+    Append-only record of delivered newsletters (one JSON object per line),
+    so that a crashed or interrupted run can be resumed without re-sending.
+    The log is opened when the SendLog is created, so an unwritable path
+    fails before anything is sent. Each line is flushed as it is recorded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sent = set()
+        self._lock = threading.Lock()
+        self._file = None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self.sent.add(json.loads(line)["abbreviation"])
+        if path:
+            self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, abbreviation, address):
+        with self._lock:
+            self.sent.add(abbreviation)
+            if self._file is not None:
+                self._file.write(json.dumps({
+                    "abbreviation": abbreviation, "to": address, "sent_at": time.time()
+                }) + "\n")
+                self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RateLimiter:
+    """Space calls at least 1/rate seconds apart across all worker threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _is_transient(error):
+    """Disconnects, socket errors and 4xx replies are retried; 5xx are permanent."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):  # e.g. all recipients refused
+        return False
+    return isinstance(error, OSError)
+
+
+class _Connection:
+    """One lazily opened, reused SMTP session; reopened after a failure."""
+
+    def __init__(self, host, port, username, password, use_ssl, starttls, timeout):
+        self.settings = (host, port, username, password, use_ssl, starttls, timeout)
+        self.smtp = None
+
+    def open(self):
+        host, port, username, password, use_ssl, starttls, timeout = self.settings
+        smtp_class = smtplib.SMTP_SSL if use_ssl else smtplib.SMTP
+        self.smtp = smtp_class(host, port, timeout=timeout)
+        if starttls and not use_ssl:
+            self.smtp.starttls()
+        if username:
+            self.smtp.login(username, password)
+        return self.smtp
+
+    def send(self, message):
+        (self.smtp or self.open()).send_message(message)
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except smtplib.SMTPException:
+                self.smtp.close()
+            except OSError:
+                pass
+            self.smtp = None
+
+
+def _build_message(sender, address, subject, name, data):
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = address
+    message["Subject"] = subject
+    html = data.decode("utf-8") if isinstance(data, bytes) else data
+    message.set_content("This newsletter is best viewed as HTML; it is also attached.")
+    message.add_alternative(html, subtype="html")
+    message.add_attachment(html.encode("utf-8"), maintype="text", subtype="html", filename=name)
+    return message
+
+
+def dispatch_newsletters(files, recipients, host, port=587, sender=None, username=None,
+                         password=None, subject=DEFAULT_SUBJECT, use_ssl=False, starttls=True,
+                         workers=1, rate=5.0, max_retries=3, retry_delay=2.0,
+                         log_path=None, timeout=30):
+    """
+    Email each rendered newsletter to its officer.
+
+    files yields ("<abbreviation>.html", bytes) pairs as produced by
+    renderer.iter_newsletter_files; recipients maps abbreviation → address
+    (see recipients_from_namelist). Messages go through a bounded queue to
+    `workers` threads, each holding one persistent SMTP connection, and the
+    whole batch is limited to `rate` messages per second. Transient failures
+    (disconnects, 4xx replies) are retried up to max_retries times on a fresh
+    connection. Deliveries are appended to log_path, and abbreviations already
+    in that log are skipped, so reruns resume where a crashed run stopped.
+
+    sender defaults to username; one of the two is required. log_path is
+    opened before sending starts, so an unwritable path raises OSError
+    straight away. Any other error while handling one newsletter (an
+    undecodable page, a failed log write) is recorded as failed like a
+    rejected delivery, and the rest are still sent.
+
+    Returns a summary with sent/skipped/failed/no_address lists, elapsed
+    seconds and messages_per_second.
+    """
+    sender = sender or username
+    if not sender:
+        raise ValueError("A sender address is required: pass sender or an SMTP username.")
+    send_log = SendLog(log_path)
+    limiter = RateLimiter(rate)
+    jobs = queue.Queue(maxsize=max(1, workers) * 4)
+    summary = {"sent": [], "skipped": [], "failed": [], "no_address": []}
+    summary_lock = threading.Lock()
+
+    def note(outcome, item):
+        with summary_lock:
+            summary[outcome].append(item)
+
+    def deliver(connection, abbreviation, address, name, data):
+        message = _build_message(sender, address, subject, name, data)
+        for attempt in range(max_retries + 1):
+            limiter.wait()
+            try:
+                connection.send(message)
+            except (smtplib.SMTPException, OSError) as e:
+                connection.close()
+                if attempt < max_retries and _is_transient(e):
+                    time.sleep(retry_delay * (attempt + 1))
+                    continue
+                note("failed", {"abbreviation": abbreviation, "to": address, "error": str(e)})
+            else:
+                send_log.record(abbreviation, address)
+                note("sent", abbreviation)
+            return
+
+    def worker():
+        connection = _Connection(host, port, username, password, use_ssl, starttls, timeout)
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                try:
+                    deliver(connection, *job)
+                except Exception as e:  # e.g. undecodable bytes; the worker keeps draining the queue
+                    abbreviation, address = job[:2]
+                    note("failed", {
+                        "abbreviation": abbreviation, "to": address, "error": f"{type(e).__name__}: {e}"
+                    })
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for name, data in files:
+            abbreviation = os.path.splitext(name)[0]
+            if abbreviation in send_log.sent:
+                note("skipped", abbreviation)
+            elif abbreviation not in recipients:
+                note("no_address", abbreviation)
+            else:
+                jobs.put((abbreviation, recipients[abbreviation], name, data))
+    finally:
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+        send_log.close()
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = elapsed
+    summary["messages_per_second"] = len(summary["sent"]) / elapsed if elapsed else 0.0
+    return summary
@@ -0,0 +1,211 @@
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+# Minimum fuzzy score (0-100) for a name to be mapped onto a roster name
+DEFAULT_THRESHOLD = 90
+# Character n-gram length used for blocking
+NGRAM = 3
+# How many of a name's rarest n-grams are probed for candidates
+PROBE_NGRAMS = 6
+# Candidates (by shared n-grams) that are actually scored with fuzzywuzzy
+MAX_CANDIDATES = 8
+
+
+def normalise_name(name):
+    """Lowercase, drop punctuation and collapse whitespace: "Tan,  Wei-Ling" → "tan wei ling"."""
+    return " ".join(re.sub(r"[^\w\s]", " ", str(name).lower()).split())
+
+
+def _compact(key):
+    return key.replace(" ", "")
+
+
+def _ngrams(key):
+    compact = _compact(key)
+    if len(compact) <= NGRAM:
+        return {compact}
+    return {compact[i:i + NGRAM] for i in range(len(compact) - NGRAM + 1)}
+
+
+def _score(key, other):
+    # Digits in a name are identifiers ("Officer 12"); never fuzz across them
+    if re.sub(r"\D", "", key) != re.sub(r"\D", "", other):
+        return 0
+    # ratio on the compacted names catches spacing ("Weiling"/"Wei Ling"),
+    # token_sort_ratio catches reordered given and family names
+    return max(
+        fuzz.ratio(_compact(key), _compact(other)),
+        fuzz.token_sort_ratio(key, other),
+    )
+
+
+class NameIndex:
+    """
+    Blocking index over roster names. Every name is filed under the
+    character n-grams of its normalised, space-free form; a lookup probes
+    only the buckets of the query's rarest n-grams, ranks that small
+    candidate set by shared n-grams and scores the best few with
+    fuzzywuzzy, so matching never compares every name against every other.
+    """
+
+    def __init__(self, names):
+        self.names = []
+        self.keys = []
+        self.exact = {}
+        self.compact_exact = {}  # spacing/punctuation-free key → position, or None if shared
+        self.grams = []
+        self.buckets = defaultdict(list)
+        for name in names:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            key = normalise_name(name)
+            if key in self.exact:
+                continue
+            position = len(self.names)
+            self.names.append(name)
+            self.keys.append(key)
+            self.exact[key] = position
+            compact = _compact(key)
+            self.compact_exact[compact] = None if compact in self.compact_exact else position
+            grams = _ngrams(key)
+            self.grams.append(grams)
+            for gram in grams:
+                self.buckets[gram].append(position)
+
+    def candidates(self, key):
+        grams = [gram for gram in _ngrams(key) if gram in self.buckets]
+        grams.sort(key=lambda gram: len(self.buckets[gram]))
+        shared = Counter()
+        for gram in grams[:PROBE_NGRAMS]:
+            shared.update(self.buckets[gram])
+        # Re-rank the names hit most often by their full n-gram overlap
+        query = set(grams)
+        ranked = sorted(
+            (position for position, _ in shared.most_common(MAX_CANDIDATES * 4)),
+            key=lambda position: len(query & self.grams[position]) / len(query | self.grams[position]),
+            reverse=True,
+        )
+        return ranked[:MAX_CANDIDATES]
+
+    def match(self, name, threshold=DEFAULT_THRESHOLD):
+        """
+        Return (canonical, score, method) for name. method is "exact" for
+        names equal after normalise_name, or equal once spaces are removed
+        too ("Tan Weiling"/"Tan Wei-Ling") when that identifies a single
+        roster name, "fuzzy" for a single best candidate
+        scoring at least threshold, "ambiguous" when two roster names tie for
+        the best score, and "unmatched" otherwise (canonical is then None).
+        """
+        key = normalise_name(name)
+        if key in self.exact:
+            return self.names[self.exact[key]], 100, "exact"
+        position = self.compact_exact.get(_compact(key))
+        if position is not None:
+            return self.names[position], 100, "exact"
+
+        scored = sorted(
+            ((_score(key, self.keys[position]), position) for position in self.candidates(key)),
+            reverse=True,
+        )
+        if not scored or scored[0][0] < threshold:
+            return None, scored[0][0] if scored else 0, "unmatched"
+        if len(scored) > 1 and scored[1][0] == scored[0][0]:
+            return None, scored[0][0], "ambiguous"
+        return self.names[scored[0][1]], scored[0][0], "fuzzy"
+
+
+def _resolve_conflicts(rows):
+    """
+    For a source with one row per officer (case_load.csv), a roster name
+    may be claimed by its exact spelling or by a single fuzzy spelling,
+    never both: a fuzzy name next to an exact one (or next to another fuzzy
+    name for the same officer) is more likely someone else, e.g. a departed
+    officer, whose row must not replace the roster officer's. Those fuzzy
+    names become "conflict" with no canonical.
+    """
+    exact = {canonical for _, canonical, _, method in rows if method == "exact"}
+    fuzzy = Counter(canonical for _, canonical, _, method in rows if method == "fuzzy")
+    return [
+        (name, None, score, "conflict")
+        if method == "fuzzy" and (canonical in exact or fuzzy[canonical] > 1)
+        else (name, canonical, score, method)
+        for name, canonical, score, method in rows
+    ]
+
+
+def reconcile_names(namelist_df, sources, threshold=DEFAULT_THRESHOLD, one_row_per_officer=()):
+    """
+    Match every distinct name in each of sources ({label: DataFrame with a
+    'name' column}) against the namelist_df roster. Returns a report
+    DataFrame with one row per distinct name: source, name, canonical,
+    score and method (see NameIndex.match). In the sources labelled in
+    one_row_per_officer, a fuzzy match onto an officer the source already
+    names another way is reported as "conflict" instead; being a different
+    person there, that name is a conflict in every other source too. Apart
+    from that, other sources (like free-typed ratings) may spell one
+    officer several ways.
+    """
+    index = NameIndex(namelist_df["name"])
+    matches = {}  # names usually recur across sources; match each once
+    per_source = {}
+    for source, df in sources.items():
+        source_rows = []
+        for name in pd.unique(df["name"].dropna()):
+            if name not in matches:
+                matches[name] = index.match(name, threshold)
+            source_rows.append((name, *matches[name]))
+        if source in one_row_per_officer:
+            source_rows = _resolve_conflicts(source_rows)
+        per_source[source] = source_rows
+
+    conflicts = {name for source_rows in per_source.values()
+                 for name, _, _, method in source_rows if method == "conflict"}
+    rows = [
+        (source, name, None, score, "conflict") if method == "fuzzy" and name in conflicts
+        else (source, name, canonical, score, method)
+        for source, source_rows in per_source.items()
+        for name, canonical, score, method in source_rows
+    ]
+    return pd.DataFrame(rows, columns=["source", "name", "canonical", "score", "method"])
+
+
+def canonical_mapping(report, source):
+    """{name: canonical} for the names of source that must be rewritten to join."""
+    rows = report[(report["source"] == source) & report["canonical"].notna()]
+    return {
+        name: canonical
+        for name, canonical in zip(rows["name"], rows["canonical"])
+        if str(name).lower() != canonical.lower()
+    }
+
+
+def apply_canonical_names(df, mapping):
+    """Copy of df with its 'name' column rewritten through mapping (dtype kept)."""
+    if not mapping:
+        return df
+    codes, uniques = pd.factorize(df["name"])
+    replaced = np.array([mapping.get(name, name) for name in uniques] + [np.nan], dtype=object)
+    names = pd.Series(replaced[codes], index=df.index)
+    df = df.copy()
+    dtype = df["name"].dtype
+    df["name"] = names.astype("category" if isinstance(dtype, pd.CategoricalDtype) else dtype)
+    return df
+
+
+def reconcile_inputs(namelist_df, case_df, ratings_df, threshold=DEFAULT_THRESHOLD):
+    """
+    Reconciliation stage run after loading: map case_load and ratings names
+    onto the roster's spelling so the processor's exact (lowercased) joins
+    find them. Returns (case_df, ratings_df, report).
+    """
+    report = reconcile_names(
+        namelist_df, {"case_load.csv": case_df, "ratings.csv": ratings_df}, threshold,
+        one_row_per_officer=("case_load.csv",)
+    )
+    case_df = apply_canonical_names(case_df, canonical_mapping(report, "case_load.csv"))
+    ratings_df = apply_canonical_names(ratings_df, canonical_mapping(report, "ratings.csv"))
+    return case_df, ratings_df, report
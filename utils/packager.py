@@ -0,0 +1,42 @@
+import os
+import tempfile
+import zipfile
+from time import perf_counter
+
+
+# Archives up to this size stay in memory; larger ones spill to a temp file.
+DEFAULT_SPILL_THRESHOLD = 64 * 1024 * 1024
+
+
+def write_zip(files, spill_threshold=DEFAULT_SPILL_THRESHOLD):
+    """
+    Stream (name, bytes) pairs into a deflated ZIP archive as they arrive.
+    The archive is held in a SpooledTemporaryFile, so it only moves to disk
+    once it grows past spill_threshold bytes. Returns the file object,
+    rewound to the start; the caller should close it when done.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=spill_threshold)
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for name, data in files:
+            zipf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def write_files(files, output_dir, timings=None):
+    """
+    Opt-in disk sink: write each (name, bytes) pair to output_dir/name.
+    Returns the list of paths written. If timings is a list,
+    {"name", "write_seconds", "bytes"} is appended to it for each file.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for name, data in files:
+        started = perf_counter()
+        path = os.path.join(output_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        written.append(path)
+        if timings is not None:
+            timings.append({"name": name, "write_seconds": perf_counter() - started, "bytes": len(data)})
+    return written
@@ -0,0 +1,348 @@
+import threading
+from time import perf_counter
+
+from utils.data_loader import resolve_caseload_schema
+from utils.history import attach_history, load_history, record_period
+from utils.incremental import ArtifactCache, officer_fingerprints, with_history
+from utils.packager import write_files, write_zip
+from utils.processor import compute_all_officer_stats, compute_officer_stats
+from utils.renderer import iter_rendered, read_template_sources, stylesheet_file
+
+# Stages in the order they run; each reports officers processed
+STAGES = ("prepare", "compute", "render", "package", "compare", "record")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def add_write_timings(report_timings, write_timings):
+    """Fill report_timings' write_seconds from utils.packager.write_files timings."""
+    seconds = {timing["name"]: timing["write_seconds"] for timing in write_timings}
+    for timing in report_timings:
+        timing["write_seconds"] = seconds.get(f"{timing['abbreviation']}.html")
+
+
+class GenerationJob:
+    """
+    The compute → render → package pipeline for one upload, run on a worker
+    thread so the UI stays responsive and survives reruns. The CLI runs the
+    same job in the foreground with start().join().
+
+    Poll snapshot() for per-stage progress ({stage: {"done", "total"}}),
+    status ("pending", "running", "done", "cancelled" or "failed") and,
+    once finished, stage metrics. cancel() asks the job to stop at the next
+    officer boundary. An officer whose stats or newsletter fail is recorded
+    in errors and left out of the output rather than aborting the batch.
+
+    When cache_dir is given, newsletters whose fingerprint is already in the
+    artifact cache are reused (see utils.incremental). history_db records
+    this period and adds trend tables; output_dir also writes the HTML files
+    to disk. compact selects a compact output mode (see utils.renderer).
+    Results are in files ([("<abbreviation>.html", bytes)], roster order,
+    after the shared stylesheet for compact="linked") and zip_file, the
+    spooled ZIP archive (see read_zip). close() releases the archive, which
+    may have spilled to disk; call it when the job is replaced.
+    report_timings has one {"abbreviation", "cached", "render_seconds",
+    "write_seconds", "bytes"} per newsletter; the seconds are None for a
+    newsletter reused from the cache or not written to disk.
+
+    With compare_size and a compact mode, the same newsletters are also
+    rendered in the standard mode (not kept) and size_comparison reports
+    {"bytes", "standard_bytes", "size_ratio"}; this costs a second render
+    of every page, so it is off by default.
+    """
+
+    def __init__(self, namelist_df, case_df, ratings_df, period, schema=None, cache_dir=None,
+                 history_db=None, history_periods=4, output_dir=None, workers=None, build_zip=True,
+                 compact=None, compare_size=False):
+        self.namelist_df = namelist_df
+        self.case_df = case_df
+        self.ratings_df = ratings_df
+        self.period = period
+        self.schema = schema
+        self.cache_dir = cache_dir
+        self.history_db = history_db
+        self.history_periods = history_periods
+        self.output_dir = output_dir
+        self.workers = workers
+        self.build_zip = build_zip
+        self.compact = compact
+        self.compare_size = compare_size
+
+        self.status = "pending"
+        self.error = None
+        self.errors = []
+        self.progress = {stage: {"done": 0, "total": 0} for stage in STAGES}
+        self.metrics = {}
+        self.files = []
+        self.zip_file = None
+        self.report_timings = []
+        self.size_comparison = None
+        self.cache_summary = {"hits": 0, "misses": 0}
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._closed = False
+
+    # ── Control ───────────────────────────────────────────────────────────────────
+
+    def start(self):
+        self.status = "running"
+        self._thread = threading.Thread(target=self._run, name="newsletter-job", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def close(self):
+        """Stop the job and release its ZIP archive; the job is not usable afterwards."""
+        self.cancel()
+        with self._lock:
+            self._closed = True
+            if self.zip_file is not None:
+                self.zip_file.close()
+                self.zip_file = None
+
+    def read_zip(self):
+        """The ZIP archive's bytes, read from the spooled file (or b"" once closed)."""
+        with self._lock:
+            if self.zip_file is None:
+                return b""
+            self.zip_file.seek(0)
+            return self.zip_file.read()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "cancelled", "failed")
+
+    def snapshot(self):
+        """A consistent copy of status, progress, metrics and error count for display."""
+        with self._lock:
+            return {
+                "status": self.status,
+                "error": self.error,
+                "errors": len(self.errors),
+                "progress": {stage: dict(counts) for stage, counts in self.progress.items()},
+                "metrics": {stage: dict(values) for stage, values in self.metrics.items()},
+            }
+
+    # ── Bookkeeping ───────────────────────────────────────────────────────────────
+
+    def _begin(self, stage, total):
+        self._check_cancelled()
+        with self._lock:
+            self.progress[stage] = {"done": 0, "total": total}
+        return perf_counter()
+
+    def _advance(self, stage, count=1):
+        with self._lock:
+            self.progress[stage]["done"] += count
+
+    def _end(self, stage, started):
+        seconds = perf_counter() - started
+        with self._lock:
+            items = self.progress[stage]["done"]
+            self.metrics[stage] = {
+                "seconds": seconds,
+                "officers": items,
+                "per_second": items / seconds if seconds else 0.0,
+            }
+
+    def _fail(self, abbreviation, stage, error):
+        with self._lock:
+            self.errors.append({"abbreviation": abbreviation, "stage": stage, "error": error})
+
+    def _check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    # ── Pipeline ──────────────────────────────────────────────────────────────────
+
+    def _run(self):
+        started = perf_counter()
+        try:
+            self._pipeline()
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:  # reported in the UI instead of killing the thread silently
+            status = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+        else:
+            status = "done"
+        seconds = perf_counter() - started
+        with self._lock:
+            newsletters = self.progress["package"]["done"]
+            self.metrics["total"] = {
+                "seconds": seconds,
+                "officers": newsletters,
+                "per_second": newsletters / seconds if seconds else 0.0,
+                "bytes": sum(len(data) for _, data in self.files),
+            }
+            self.status = status
+
+    def _pipeline(self):
+        roster = self.namelist_df.reset_index(drop=True)
+        abbreviations = [str(abbreviation) for abbreviation in roster["abbreviation"]]
+        count = len(roster)
+
+        # Schema, trend history and fingerprints; cached newsletters are reused
+        stage_started = self._begin("prepare", count)
+        schema = self.schema or resolve_caseload_schema(self.case_df.columns, self.period)
+        # One template version for the whole run: fingerprints and renders must agree
+        sources = read_template_sources()
+        history = None
+        if self.history_db:
+            history = load_history(
+                self.history_db, abbreviations, self.history_periods, before=self.period["date_end"]
+            )
+        cache = fingerprints = None
+        cached = [None] * count
+        if self.cache_dir:
+            cache = ArtifactCache(self.cache_dir)
+            fingerprints = officer_fingerprints(
+                roster, self.case_df, self.ratings_df, self.period, schema, self.compact, sources
+            )
+            if history is not None:
+                fingerprints = with_history(fingerprints, roster["abbreviation"], history)
+            for i, fingerprint in enumerate(fingerprints):
+                cached[i] = cache.get(fingerprint)
+        self._advance("prepare", count)
+        self._end("prepare", stage_started)
+
+        misses = [i for i, data in enumerate(cached) if data is None]
+        self.cache_summary = {"hits": count - len(misses), "misses": len(misses)}
+        # Recording history and the size comparison need every officer's
+        # stats, not just the misses
+        compare = bool(self.compare_size and self.compact)
+        needed = list(range(count)) if self.history_db or compare else misses
+
+        stage_started = self._begin("compute", len(needed))
+        reports = self._compute(roster.iloc[needed], schema)
+        if history is not None:
+            attach_history(list(reports.values()), history)
+        self._end("compute", stage_started)
+
+        render_positions = [i for i in misses if i in reports]
+        stage_started = self._begin("render", len(render_positions))
+        render_errors = []
+        rendered = {}
+        render_seconds = {}
+        # Newsletters come back in input order, minus any that failed to render
+        remaining = iter(render_positions)
+        newsletters = iter_rendered(
+            [reports[i] for i in render_positions], workers=self.workers, errors=render_errors,
+            compact=self.compact, sources=sources
+        )
+        try:
+            for abbreviation, html, seconds in newsletters:
+                i = next(i for i in remaining if abbreviations[i] == str(abbreviation))
+                rendered[i] = html.encode("utf-8")
+                render_seconds[i] = seconds
+                if cache is not None:
+                    cache.put(fingerprints[i], rendered[i])
+                self._advance("render")
+                self._check_cancelled()
+        finally:
+            newsletters.close()
+        for error in render_errors:
+            self._fail(**error)
+        self._advance("render", len(render_errors))
+        self._end("render", stage_started)
+
+        stage_started = self._begin("package", count)
+        files = []
+        report_timings = []
+        for i, abbreviation in enumerate(abbreviations):
+            data = cached[i] if cached[i] is not None else rendered.get(i)
+            if data is not None:
+                files.append((f"{abbreviation}.html", data))
+                report_timings.append({
+                    "abbreviation": abbreviation, "cached": cached[i] is not None,
+                    "render_seconds": render_seconds.get(i), "write_seconds": None, "bytes": len(data),
+                })
+        self._advance("package", len(files))
+        asset = stylesheet_file(self.compact, sources)
+        if asset is not None:
+            files.insert(0, asset)
+        if self.output_dir:
+            write_timings = []
+            write_files(files, self.output_dir, timings=write_timings)
+            add_write_timings(report_timings, write_timings)
+        self.report_timings = report_timings
+        if self.build_zip:
+            archive = write_zip(files)
+            with self._lock:
+                if self._closed:
+                    archive.close()
+                else:
+                    self.zip_file = archive
+        self.files = files
+        self._end("package", stage_started)
+
+        if compare:
+            packaged = [i for i in range(count) if cached[i] is not None or i in rendered]
+            self._compare_size(files, [reports[i] for i in packaged if i in reports], sources)
+
+        if self.history_db:
+            failed = {error["abbreviation"] for error in self.errors}
+            recorded = [report for report in reports.values() if str(report["abbreviation"]) not in failed]
+            stage_started = self._begin("record", len(recorded))
+            record_period(self.history_db, recorded)
+            self._advance("record", len(recorded))
+            self._end("record", stage_started)
+
+    def _compare_size(self, files, reports, sources):
+        """Render reports in the standard mode only to total their bytes."""
+        stage_started = self._begin("compare", len(reports))
+        standard_bytes = 0
+        newsletters = iter_rendered(reports, workers=self.workers, errors=[], sources=sources)
+        try:
+            for _, html, _ in newsletters:
+                standard_bytes += len(html.encode("utf-8"))
+                self._advance("compare")
+                self._check_cancelled()
+        finally:
+            newsletters.close()
+        compact_bytes = sum(len(data) for _, data in files)
+        self.size_comparison = {
+            "bytes": compact_bytes,
+            "standard_bytes": standard_bytes,
+            "size_ratio": compact_bytes / standard_bytes if standard_bytes else 1.0,
+        }
+        self._end("compare", stage_started)
+
+    def _compute(self, officers, schema):
+        """
+        {roster position: stats dict}. The whole batch goes through
+        compute_all_officer_stats; if that fails, officers are retried one by
+        one with compute_officer_stats so a single bad row only loses itself.
+        """
+        positions = list(officers.index)
+        if not positions:
+            return {}
+        try:
+            all_stats = compute_all_officer_stats(officers, self.case_df, self.ratings_df, self.period, schema)
+        except Exception:
+            all_stats = None
+        if all_stats is not None:
+            self._advance("compute", len(positions))
+            return dict(zip(positions, all_stats))
+
+        reports = {}
+        for position, (_, officer_row) in zip(positions, officers.iterrows()):
+            self._check_cancelled()
+            try:
+                reports[position] = compute_officer_stats(
+                    officer_row, self.case_df, self.ratings_df, self.period, schema
+                )
+            except Exception as e:
+                self._fail(str(officer_row["abbreviation"]), "compute", f"{type(e).__name__}: {e}")
+            self._advance("compute")
+        return reports
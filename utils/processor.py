@@ -1,164 +1,181 @@
 import pandas as pd
 import numpy as np
 
-def compute_officer_stats(officer_row, case_df, ratings_df, period):
-    officer_name = officer_row['name']
-    abbreviation = officer_row['abbreviation']
-    function = officer_row['function']  # e.g. "LO" or "LE"
-    func_lower = function.lower()
-   
-    # Helper to safely get a single officer's value from case_df
-    def safe_get(col_name):
-        if col_name not in case_df.columns:
-            return 0
-        series = case_df.loc[
-            case_df["name"].str.lower() == officer_name.lower(),
-            col_name
-        ]
-        if series.empty:
-            return 0
-        return series.iloc[0]
+from utils.data_loader import CASELOAD_METRICS, RATINGS_METADATA_COLS, resolve_caseload_schema
 
-    # Helper to compute the average for a given column, but only among
-    # rows whose 'function' matches this officer's function.
-    def safe_group_mean(col_name):
-        if col_name not in case_df.columns:
-            return "N/A"
-        # Filter to rows where function matches (case-insensitive)
-        group = case_df.loc[case_df["function"].str.lower() == func_lower, col_name]
-        if group.empty:
-            return "N/A"
-        return round(group.mean(), 1)
 
+INHOUSE_FLOW_METRICS = (
+    "inhouse_opening", "inhouse_added", "inhouse_nfa_712", "inhouse_nfa_others", "inhouse_end"
+)
+ASSIGNED_FLOW_METRICS = (
+    "assigned_opening", "assigned_added", "assigned_nfa_712", "assigned_nfa_others", "assigned_end"
+)
+
+
+def _reassigned(opening, added, nfa_712, nfa_others, end):
+    return end - ((opening + added) - (nfa_712 + nfa_others))
+
+
+def _ratings_stats(filtered_ratings):
+    """
+    Summarise one officer's rows of ratings_df into
+    (survey_ratings, inhouse_case_ratings, assigned_case_ratings).
+    """
+    if filtered_ratings is None or filtered_ratings.empty:
+        return {}, [], []
+
+    question_cols = [col for col in filtered_ratings.columns if col not in RATINGS_METADATA_COLS]
+    survey_ratings = {col: round(filtered_ratings[col].mean(), 2) for col in question_cols}
+
+    temp = filtered_ratings.copy()
+    temp['avg_score'] = temp[question_cols].mean(axis=1)
+
+    inhouse_case_ratings = []
+    assigned_case_ratings = []
+    for _, row in temp.iterrows():
+        entry = {
+            'case_ref': row['case ref no'],
+            'applicant': row['applicant'],
+            'score': round(row['avg_score'], 2)
+        }
+        if str(row['assigned out indicator']).strip().upper() == 'N':
+            inhouse_case_ratings.append(entry)
+        else:
+            assigned_case_ratings.append(entry)
+    return survey_ratings, inhouse_case_ratings, assigned_case_ratings
+
+
+def _ratings_by_officer(ratings_df):
+    """
+    Grouped equivalent of _ratings_stats for every officer at once. Question
+    means come from one groupby, per-case averages from a row-wise NumPy mean,
+    and the in-house/assigned split from a vectorised mask. Returns
+    {lowercased name: (survey_ratings, inhouse_case_ratings, assigned_case_ratings)}.
+    """
+    if ratings_df.empty:
+        return {}
+
+    keys = ratings_df['name'].str.lower()
+    codes, uniques = pd.factorize(keys)
+    question_cols = [col for col in ratings_df.columns if col not in RATINGS_METADATA_COLS]
+
+    # Per-officer question means, one row per factorized name code
+    means = ratings_df[question_cols].groupby(codes).mean()
+    means = means[means.index >= 0]
+
+    # Per-case average score across question columns, skipping blanks
+    scores = ratings_df[question_cols].to_numpy(dtype=float)
+    answered = ~np.isnan(scores)
+    answered_count = answered.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_scores = np.where(answered, scores, 0).sum(axis=1) / answered_count
+    avg_scores[answered_count == 0] = np.nan
+
+    inhouse = (
+        ratings_df['assigned out indicator'].astype(str).str.strip().str.upper() == 'N'
+    ).to_numpy()
+    case_refs = ratings_df['case ref no'].to_numpy()
+    applicants = ratings_df['applicant'].to_numpy()
+
+    # Row positions grouped by officer, preserving file order within each group
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+
+    summaries = {}
+    for positions in np.split(order, boundaries):
+        code = codes[positions[0]]
+        if code < 0:
+            continue
+        survey_ratings = {col: round(value, 2) for col, value in means.loc[code].items()}
+        inhouse_case_ratings = []
+        assigned_case_ratings = []
+        for position in positions:
+            entry = {
+                'case_ref': case_refs[position],
+                'applicant': applicants[position],
+                'score': round(avg_scores[position], 2)
+            }
+            if inhouse[position]:
+                inhouse_case_ratings.append(entry)
+            else:
+                assigned_case_ratings.append(entry)
+        summaries[uniques[code]] = (survey_ratings, inhouse_case_ratings, assigned_case_ratings)
+    return summaries
+
+
+def _build_stats(officer_name, abbreviation, function, period,
+                 safe_get, safe_group_mean, safe_group_reassigned_mean, ratings):
+    """
+    Assemble the per-officer stats dict. The three lookup callables take
+    logical metric names from CaseloadSchema and hide how case_df is accessed,
+    so the single-officer and whole-roster entry points share exactly the
+    same arithmetic. ratings is the (survey, in-house, assigned) triple.
+    """
     #
     # ── IN‐HOUSE STATISTICS ─────────────────────────────────────────────────────────
     #
 
-    inhouse_opening    = safe_get(f"in-house caseload as at {period['date_start']}")
-    inhouse_added      = safe_get(f"additional in-house cases between {period['date_start']} to {period['date_end']}")
-    inhouse_nfa_712    = safe_get(f"in-house cases nfa- 07 and nfa-12 between {period['date_start']} to {period['date_end']}")
-    inhouse_nfa_others = safe_get(f"in-house cases nfa- others between {period['date_start']} to {period['date_end']}")
-    inhouse_end        = safe_get(f"in-house caseload as at {period['date_end']}")
+    inhouse_opening    = safe_get("inhouse_opening")
+    inhouse_added      = safe_get("inhouse_added")
+    inhouse_nfa_712    = safe_get("inhouse_nfa_712")
+    inhouse_nfa_others = safe_get("inhouse_nfa_others")
+    inhouse_end        = safe_get("inhouse_end")
 
     # ── REASSIGNED IN‐HOUSE (computed) ─────────────────────────────────────────────
     inhouse_completed   = inhouse_nfa_712 + inhouse_nfa_others
     inhouse_reassigned  = inhouse_end - ((inhouse_opening + inhouse_added) - inhouse_completed)
 
     # In‐house averages (across officers with same function), rounded to one decimal
-    avg_inhouse_opening       = safe_group_mean(f"in-house caseload as at {period['date_start']}")
-    avg_inhouse_added         = safe_group_mean(f"additional in-house cases between {period['date_start']} to {period['date_end']}")
-    avg_inhouse_nfa_712       = safe_group_mean(f"in-house cases nfa- 07 and nfa-12 between {period['date_start']} to {period['date_end']}")
-    avg_inhouse_nfa_others    = safe_group_mean(f"in-house cases nfa- others between {period['date_start']} to {period['date_end']}")
-    avg_inhouse_reassigned    = "N/A"
-    # Compute average reassigned for in-house group if all relevant columns exist
-    ih_cols = {
-        f"in-house caseload as at {period['date_start']}",
-        f"additional in-house cases between {period['date_start']} to {period['date_end']}",
-        f"in-house cases nfa- 07 and nfa-12 between {period['date_start']} to {period['date_end']}",
-        f"in-house cases nfa- others between {period['date_start']} to {period['date_end']}",
-        f"in-house caseload as at {period['date_end']}"
-    }
-    if ih_cols.issubset(set(case_df.columns)):
-        group_df = case_df[case_df["function"].str.lower() == func_lower]
-        series_op = group_df[f"in-house caseload as at {period['date_start']}"]
-        series_ad = group_df[f"additional in-house cases between {period['date_start']} to {period['date_end']}"]
-        series_nfa712 = group_df[f"in-house cases nfa- 07 and nfa-12 between {period['date_start']} to {period['date_end']}"]
-        series_nfaoth = group_df[f"in-house cases nfa- others between {period['date_start']} to {period['date_end']}"]
-        series_end = group_df[f"in-house caseload as at {period['date_end']}"]
-        series_completed = series_nfa712 + series_nfaoth
-        series_reassigned = series_end - ((series_op + series_ad) - series_completed)
-        avg_inhouse_reassigned = round(series_reassigned.mean(), 1)
-    avg_inhouse_end            = safe_group_mean(f"in-house caseload as at {period['date_end']}")
-    avg_increase_decrease_ih   = safe_group_mean("increase /decrease of cases")
-    avg_clearance_rate_ih      = safe_group_mean("clearance rate (%)")
+    avg_inhouse_opening       = safe_group_mean("inhouse_opening")
+    avg_inhouse_added         = safe_group_mean("inhouse_added")
+    avg_inhouse_nfa_712       = safe_group_mean("inhouse_nfa_712")
+    avg_inhouse_nfa_others    = safe_group_mean("inhouse_nfa_others")
+    avg_inhouse_reassigned    = safe_group_reassigned_mean(INHOUSE_FLOW_METRICS)
+    avg_inhouse_end            = safe_group_mean("inhouse_end")
+    avg_increase_decrease_ih   = safe_group_mean("increase_decrease_inhouse")
+    avg_clearance_rate_ih      = safe_group_mean("clearance_rate_inhouse")
 
     #
     # ── ASSIGNED STATISTICS ────────────────────────────────────────────────────────
     #
 
-    assigned_opening    = safe_get(f"assigned caseload as at {period['date_start']}")
-    assigned_added      = safe_get(f"additional assigned cases between {period['date_start']} to {period['date_end']}")
-    assigned_nfa_712    = safe_get(f"assigned cases nfa- 07 between {period['date_start']} to {period['date_end']}")
-    assigned_nfa_others = safe_get(f"assigned cases nfa- others between {period['date_start']} to {period['date_end']}")
-    assigned_end        = safe_get(f"assigned caseload as at {period['date_end']}")
+    assigned_opening    = safe_get("assigned_opening")
+    assigned_added      = safe_get("assigned_added")
+    assigned_nfa_712    = safe_get("assigned_nfa_712")
+    assigned_nfa_others = safe_get("assigned_nfa_others")
+    assigned_end        = safe_get("assigned_end")
 
     # ── REASSIGNED ASSIGNED (computed) ──────────────────────────────────────────────
     assigned_completed    = assigned_nfa_712 + assigned_nfa_others
     assigned_reassigned   = assigned_end - ((assigned_opening + assigned_added) - assigned_completed)
 
     # Assigned averages for the same function group, one decimal
-    avg_assigned_opening     = safe_group_mean(f"assigned caseload as at {period['date_start']}")
-    avg_assigned_added       = safe_group_mean(f"additional assigned cases between {period['date_start']} to {period['date_end']}")
-    avg_assigned_nfa_712     = safe_group_mean(f"assigned cases nfa- 07 between {period['date_start']} to {period['date_end']}")
-    avg_assigned_nfa_others  = safe_group_mean(f"assigned cases nfa- others between {period['date_start']} to {period['date_end']}")
-    avg_assigned_reassigned  = "N/A"
-    as_cols = {
-        f"assigned caseload as at {period['date_start']}",
-        f"additional assigned cases between {period['date_start']} to {period['date_end']}",
-        f"assigned cases nfa- 07 between {period['date_start']} to {period['date_end']}",
-        f"assigned cases nfa- others between {period['date_start']} to {period['date_end']}",
-        f"assigned caseload as at {period['date_end']}"
-    }
-    if as_cols.issubset(set(case_df.columns)):
-        group_df_a = case_df[case_df["function"].str.lower() == func_lower]
-        series_op_a = group_df_a[f"assigned caseload as at {period['date_start']}"]
-        series_ad_a = group_df_a[f"additional assigned cases between {period['date_start']} to {period['date_end']}"]
-        series_nfa712_a = group_df_a[f"assigned cases nfa- 07 between {period['date_start']} to {period['date_end']}"]
-        series_nfaoth_a = group_df_a[f"assigned cases nfa- others between {period['date_start']} to {period['date_end']}"]
-        series_end_a = group_df_a[f"assigned caseload as at {period['date_end']}"]
-        series_completed_a = series_nfa712_a + series_nfaoth_a
-        series_reassigned_a = series_end_a - ((series_op_a + series_ad_a) - series_completed_a)
-        avg_assigned_reassigned = round(series_reassigned_a.mean(), 1)
-    avg_assigned_end            = safe_group_mean(f"assigned caseload as at {period['date_end']}")
-    avg_increase_decrease_as    = safe_group_mean("increase/ decrease of cases")
-    avg_clearance_rate_as       = safe_group_mean("clearance rate (%).1")
+    avg_assigned_opening     = safe_group_mean("assigned_opening")
+    avg_assigned_added       = safe_group_mean("assigned_added")
+    avg_assigned_nfa_712     = safe_group_mean("assigned_nfa_712")
+    avg_assigned_nfa_others  = safe_group_mean("assigned_nfa_others")
+    avg_assigned_reassigned  = safe_group_reassigned_mean(ASSIGNED_FLOW_METRICS)
+    avg_assigned_end            = safe_group_mean("assigned_end")
+    avg_increase_decrease_as    = safe_group_mean("increase_decrease_assigned")
+    avg_clearance_rate_as       = safe_group_mean("clearance_rate_assigned")
 
     #
     # ── TOTAL CASELOAD & OVERALL STATISTICS ─────────────────────────────────────────
     #
-    total_start = safe_get(f"total caseload as at {period['date_start']}")
-    total_end   = safe_get(f"total caseload as at {period['date_end']}")
-    total_nfa_ed = safe_get("total cases nfa-ed")
-    pct_change_overall = safe_get("% increase or decrease")
+    total_start = safe_get("total_start")
+    total_end   = safe_get("total_end")
+    total_nfa_ed = safe_get("total_nfa_ed")
+    pct_change_overall = safe_get("pct_change_overall")
 
-    avg_total_start = safe_group_mean(f"total caseload as at {period['date_start']}")
-    avg_total_end   = safe_group_mean(f"total caseload as at {period['date_end']}")
-    avg_total_nfa   = safe_group_mean("total cases nfa-ed")
-    avg_pct_change  = safe_group_mean("% increase or decrease")
+    avg_total_start = safe_group_mean("total_start")
+    avg_total_end   = safe_group_mean("total_end")
+    avg_total_nfa   = safe_group_mean("total_nfa_ed")
+    avg_pct_change  = safe_group_mean("pct_change_overall")
 
     #
     # ── RATINGS EXTRACTION ───────────────────────────────────────────────────────────
     #
-    metadata_cols = {
-        'case ref no', 'subject matter', 'mto',
-        'assigned out indicator', 'applicant', 'abbreviation', 'name', 'type'
-    }
-
-    filtered_ratings = ratings_df[ratings_df['name'].str.lower() == officer_name.lower()]
-
-    if not filtered_ratings.empty:
-        question_cols = [col for col in filtered_ratings.columns if col not in metadata_cols]
-        survey_ratings = {col: round(filtered_ratings[col].mean(), 2) for col in question_cols}
-
-        temp = filtered_ratings.copy()
-        temp['avg_score'] = temp[question_cols].mean(axis=1)
-
-        inhouse_case_ratings = []
-        assigned_case_ratings = []
-        for _, row in temp.iterrows():
-            entry = {
-                'case_ref': row['case ref no'],
-                'applicant': row['applicant'],
-                'score': round(row['avg_score'], 2)
-            }
-            if str(row['assigned out indicator']).strip().upper() == 'N':
-                inhouse_case_ratings.append(entry)
-            else:
-                assigned_case_ratings.append(entry)
-    else:
-        survey_ratings = {}
-        inhouse_case_ratings = []
-        assigned_case_ratings = []
+    survey_ratings, inhouse_case_ratings, assigned_case_ratings = ratings
 
     #
     # ── ASSEMBLE FINAL STATS DICTIONARY ────────────────────────────────────────────
@@ -228,3 +245,165 @@ def compute_officer_stats(officer_row, case_df, ratings_df, period):
     }
 
     return stats
+
+
+def select_officers(namelist_df, function_filter="All", selected_officers=None):
+    """
+    Narrow the roster to one function ("LO"/"LE"; "All" keeps everyone) and,
+    if selected_officers is non-empty, to those names.
+    """
+    if function_filter and function_filter != "All":
+        namelist_df = namelist_df[namelist_df['function'].str.upper() == function_filter.upper()]
+    if selected_officers:
+        namelist_df = namelist_df[namelist_df['name'].str.strip().isin(selected_officers)]
+    return namelist_df.copy()
+
+
+def compute_officer_stats(officer_row, case_df, ratings_df, period, schema=None):
+    if schema is None:
+        schema = resolve_caseload_schema(case_df.columns, period)
+
+    officer_name = officer_row['name']
+    abbreviation = officer_row['abbreviation']
+    function = officer_row['function']  # e.g. "LO" or "LE"
+    func_lower = function.lower()
+
+    # Helper to safely get a single officer's value from case_df
+    def safe_get(metric):
+        position = schema.position(metric)
+        if position is None:
+            return 0
+        series = case_df.iloc[
+            (case_df["name"].str.lower() == officer_name.lower()).to_numpy(),
+            position
+        ]
+        if series.empty:
+            return 0
+        return series.iloc[0]
+
+    # Helper to compute the average for a given metric, but only among
+    # rows whose 'function' matches this officer's function.
+    def safe_group_mean(metric):
+        position = schema.position(metric)
+        if position is None:
+            return "N/A"
+        # Filter to rows where function matches (case-insensitive)
+        group = case_df.iloc[(case_df["function"].str.lower() == func_lower).to_numpy(), position]
+        if group.empty:
+            return "N/A"
+        return round(group.mean(), 1)
+
+    # Average reassigned count for the function group, if all relevant columns exist
+    def safe_group_reassigned_mean(metrics):
+        if not all(schema.has(metric) for metric in metrics):
+            return "N/A"
+        group_df = case_df[case_df["function"].str.lower() == func_lower]
+        series_reassigned = _reassigned(*(group_df.iloc[:, schema.position(m)] for m in metrics))
+        return round(series_reassigned.mean(), 1)
+
+    filtered_ratings = ratings_df[ratings_df['name'].str.lower() == officer_name.lower()]
+
+    return _build_stats(
+        officer_name, abbreviation, function, period,
+        safe_get, safe_group_mean, safe_group_reassigned_mean, _ratings_stats(filtered_ratings)
+    )
+
+
+def _absent_group_averages(schema):
+    # What compute_officer_stats reports for a function with no caseload rows
+    averages = {metric: "N/A" for metric in CASELOAD_METRICS}
+    for metrics in (INHOUSE_FLOW_METRICS, ASSIGNED_FLOW_METRICS):
+        averages[metrics] = np.nan if all(schema.has(m) for m in metrics) else "N/A"
+    return averages
+
+
+def function_group_averages(case_df, schema):
+    """
+    Average of every caseload metric (and of the computed in-house/assigned
+    reassigned counts, keyed by INHOUSE_FLOW_METRICS / ASSIGNED_FLOW_METRICS)
+    per lowercased function, rounded to one decimal. Metrics missing from the
+    upload are "N/A". Returns {function: {metric: average}}.
+    """
+    averages = {}
+    for func_lower, group in case_df.groupby(case_df["function"].str.lower(), sort=False):
+        group_avg = {}
+        for metric in CASELOAD_METRICS:
+            position = schema.position(metric)
+            group_avg[metric] = "N/A" if position is None else round(group.iloc[:, position].mean(), 1)
+        for metrics in (INHOUSE_FLOW_METRICS, ASSIGNED_FLOW_METRICS):
+            if all(schema.has(metric) for metric in metrics):
+                series_reassigned = _reassigned(*(group.iloc[:, schema.position(m)] for m in metrics))
+                group_avg[metrics] = round(series_reassigned.mean(), 1)
+            else:
+                group_avg[metrics] = "N/A"
+        averages[func_lower] = group_avg
+    return averages
+
+
+def compute_all_officer_stats(namelist_df, case_df, ratings_df, period, schema=None):
+    """
+    Whole-roster equivalent of calling compute_officer_stats for every row of
+    namelist_df. Names and functions are lowercased once, each officer is
+    matched to their first case_df row through a single index lookup, ratings
+    are partitioned with one groupby, and function-group averages are computed
+    once per group instead of once per officer.
+
+    schema is the CaseloadSchema for this upload; it is resolved from
+    case_df.columns when not supplied. Returns a list of stats dicts in
+    namelist_df row order.
+    """
+    if schema is None:
+        schema = resolve_caseload_schema(case_df.columns, period)
+
+    case_names = case_df["name"].str.lower()
+
+    # ── Join roster → caseload (first matching row, as safe_get does) ──────────
+    first_rows = case_names.notna() & ~case_names.duplicated()
+    name_index = pd.Index(case_names[first_rows])
+    first_positions = np.flatnonzero(first_rows.to_numpy())
+
+    roster_keys = namelist_df["name"].str.lower()
+    hits = name_index.get_indexer(roster_keys)
+    row_positions = np.where(hits >= 0, first_positions[np.maximum(hits, 0)], -1)
+
+    # One NumPy array per resolved metric, taken by column position
+    metric_values = {
+        metric: case_df.iloc[:, position].to_numpy()
+        for metric, position in zip(CASELOAD_METRICS, schema.index_map)
+        if position >= 0
+    }
+
+    # ── Function-group averages, computed once per group ──────────────────────
+    group_averages = function_group_averages(case_df, schema)
+    absent_group = _absent_group_averages(schema)
+
+    # ── Ratings summarised for every officer in one grouped pass ──────────────
+    ratings_by_name = _ratings_by_officer(ratings_df)
+
+    all_stats = []
+    for officer_name, officer_key, abbreviation, function, position in zip(
+        namelist_df['name'], roster_keys, namelist_df['abbreviation'],
+        namelist_df['function'], row_positions
+    ):
+        func_lower = function.lower() if isinstance(function, str) else None
+
+        def safe_get(metric, position=position):
+            if metric not in metric_values or position < 0:
+                return 0
+            return metric_values[metric][position]
+
+        averages = group_averages.get(func_lower, absent_group)
+
+        def safe_group_mean(metric, averages=averages):
+            return averages[metric]
+
+        def safe_group_reassigned_mean(metrics, averages=averages):
+            return averages[metrics]
+
+        all_stats.append(_build_stats(
+            officer_name, abbreviation, function, period,
+            safe_get, safe_group_mean, safe_group_reassigned_mean,
+            ratings_by_name.get(officer_key) or ({}, [], [])
+        ))
+
+    return all_stats
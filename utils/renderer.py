@@ -1,5 +1,85 @@
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from time import perf_counter
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+from markupsafe import Markup
 import os
+import re
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+TEMPLATE_NAME = "newsletter.html"
+STYLESHEET_NAME = "newsletter.css"
+
+# Compact output: "inline" minifies each page and its inline CSS; "linked"
+# also moves the CSS into one shared newsletter.css that every page links to.
+COMPACT_MODES = ("inline", "linked")
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(source):
+    """
+    Whitespace-minify template source: drop HTML comments, remove line
+    breaks and indentation between tags, and collapse other whitespace runs
+    to one space. Jinja tags are kept; trim_blocks/lstrip_blocks remove the
+    whitespace they leave behind.
+    """
+    source = re.sub(r"<!--.*?-->", "", source, flags=re.S)
+    source = re.sub(r">\s*\n\s*<", "><", source)
+    return re.sub(r"\s+", " ", source)
+
+
+@dataclass(frozen=True)
+class TemplateSources:
+    """
+    The template and stylesheet text one run renders with. Read it once per
+    run and pass it to every render and fingerprint, so a template edited
+    mid-run (or while the app is up) can never be rendered under the other
+    version's fingerprint.
+    """
+    html: str
+    css: str
+
+
+def read_template_sources():
+    """Current newsletter.html and newsletter.css from TEMPLATE_DIR."""
+    texts = []
+    for name in (TEMPLATE_NAME, STYLESHEET_NAME):
+        with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+            texts.append(f.read())
+    return TemplateSources(*texts)
+
+
+@lru_cache(maxsize=8)
+def _minified_css(css):
+    return minify_css(css)
+
+
+def read_stylesheet(compact=None, sources=None):
+    css = (sources or read_template_sources()).css
+    return _minified_css(css) if compact else css
+
+
+def stylesheet_file(compact=None, sources=None):
+    """("newsletter.css", bytes) to ship alongside "linked" pages, else None."""
+    if compact != "linked":
+        return None
+    return STYLESHEET_NAME, read_stylesheet(compact, sources).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _stars(half_stars):
+    full_stars = half_stars // 2
+    half_star   = half_stars % 2
+    return "★" * full_stars + ("½" if half_star else "") + "☆" * (5 - full_stars - half_star)
 
 
 def stars_from_score(score):
@@ -10,38 +90,134 @@ def stars_from_score(score):
       3.5 → '★★★☆☆'
       2.0 → '★★☆☆☆'
     If score is not a number (e.g. 'N/A'), return an empty string.
+    The strings themselves are memoised per half-star count.
     """
     try:
         val = float(score)
     except Exception:
         return ""
     # Round to nearest half‐star
-    half_stars = int(round(val * 2))
-    full_stars = half_stars // 2
-    half_star   = half_stars % 2
-    stars = "★" * full_stars + ("½" if half_star else "") + "☆" * (5 - full_stars - half_star)
-    return stars
+    try:
+        half_stars = int(round(val * 2))
+    except ValueError:  # NaN
+        return ""
+    return _stars(half_stars)
 
 
-def render_newsletters(all_reports, output_dir="generated"):
+def get_template(bytecode_cache_dir=None, compact=None, sources=None):
     """
-    Render each officer’s stats into an HTML file that matches VL.html’s style
-    (including star‐based ratings). all_reports is a list of dicts returned by
-    compute_officer_stats. output_dir is a Path or string; files will be written
-    to output_dir/<abbreviation>.html
+    The compiled newsletter.html for sources (a TemplateSources; the files
+    currently on disk when None). Each version of the sources is compiled
+    once per process, and an edited template is picked up by the next call.
+    When bytecode_cache_dir is given, compiled template code is also cached
+    on disk so that fresh worker processes skip the compile step.
+
+    compact is None for the standard output or one of COMPACT_MODES. The
+    stylesheet (minified when compact) is bound as a template global, so it
+    is a constant in every render rather than re-read or re-included per
+    officer.
     """
+    if compact not in (None,) + COMPACT_MODES:
+        raise ValueError(f"Unknown compact mode {compact!r}; expected one of {COMPACT_MODES}.")
+    return _compile_template(bytecode_cache_dir, compact, sources or read_template_sources())
+
+
+@lru_cache(maxsize=8)
+def _compile_template(bytecode_cache_dir, compact, sources):
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+    # Minified once here, so rendering only fills in the dynamic parts of
+    # already-compact static text
+    html = minify_html(sources.html) if compact else sources.html
     env = Environment(
-        loader=FileSystemLoader(searchpath=os.path.join(os.getcwd(), "templates")),
-        autoescape=True
+        loader=DictLoader({TEMPLATE_NAME: html}),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+        trim_blocks=bool(compact),
+        lstrip_blocks=bool(compact)
     )
 
     # ── REGISTER stars_from_score AS A GLOBAL IN THE TEMPLATE ────────────────────
     env.globals['stars_from_score'] = stars_from_score
+    env.globals['stylesheet'] = Markup(read_stylesheet(compact, sources))
+    env.globals['stylesheet_href'] = STYLESHEET_NAME if compact == "linked" else None
+
+    return env.get_template(TEMPLATE_NAME)
+
 
-    template = env.get_template("newsletter.html")
+def _render_chunk(reports, bytecode_cache_dir=None, collect_errors=False, compact=None, sources=None):
+    template = get_template(bytecode_cache_dir, compact, sources)
+    rendered = []
+    for report in reports:
+        started = perf_counter()
+        try:
+            html = template.render(officer=report)
+        except Exception as e:
+            if not collect_errors:
+                raise
+            # html None marks a failure; the message takes the place of the timing
+            rendered.append((report['abbreviation'], None, f"{type(e).__name__}: {e}"))
+            continue
+        rendered.append((report['abbreviation'], html, perf_counter() - started))
+    return rendered
 
-    os.makedirs(output_dir, exist_ok=True)
-    for report in all_reports:
-        output_path = os.path.join(output_dir, f"{report['abbreviation']}.html")
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(template.render(officer=report))
+
+def iter_rendered(all_reports, workers=None, chunksize=32, bytecode_cache_dir=None, errors=None,
+                  compact=None, sources=None):
+    """
+    Yield (abbreviation, html, render_seconds) for each report, in input order.
+    With workers > 1 the reports are rendered in chunks on a process pool;
+    otherwise they are rendered in this process.
+
+    If errors is a list, a report that fails to render is skipped and
+    {"abbreviation", "stage", "error"} is appended to it instead of the
+    exception ending the whole run. Closing the generator early cancels
+    chunks that have not started rendering. compact selects a compact
+    output mode and sources the template version (see get_template); the
+    sources are read once here, so every chunk renders the same version.
+    """
+    all_reports = list(all_reports)
+    sources = sources or read_template_sources()
+    chunks = [all_reports[i:i + chunksize] for i in range(0, len(all_reports), chunksize)]
+    collect_errors = errors is not None
+
+    def unpack(rendered):
+        for abbreviation, html, seconds in rendered:
+            if html is None:
+                errors.append({"abbreviation": abbreviation, "stage": "render", "error": seconds})
+            else:
+                yield abbreviation, html, seconds
+
+    if not workers or workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from unpack(_render_chunk(chunk, bytecode_cache_dir, collect_errors, compact, sources))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_render_chunk, chunk, bytecode_cache_dir, collect_errors, compact, sources)
+            for chunk in chunks
+        ]
+        try:
+            for future in futures:
+                yield from unpack(future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def iter_newsletter_files(all_reports, workers=None, bytecode_cache_dir=None, compact=None, sources=None):
+    """
+    Yield ("<abbreviation>.html", utf-8 bytes) for each report without touching
+    the disk. Feed the pairs to utils.packager.write_zip / write_files, or
+    straight into download buttons. With compact="linked", ship
+    stylesheet_file("linked", sources) alongside the pages.
+    """
+    for abbreviation, html, _ in iter_rendered(
+        all_reports, workers=workers, bytecode_cache_dir=bytecode_cache_dir, compact=compact,
+        sources=sources
+    ):
+        yield f"{abbreviation}.html", html.encode("utf-8")